@@ -0,0 +1 @@
+python3 benchmarks/run_benchmarks.py "$@"
\ No newline at end of file
@@ -0,0 +1,102 @@
+import os
+import random
+
+WORDS = ('elf', 'ring', 'shire', 'hobbit', 'wizard', 'mountain', 'river', 'forest', 'tower', 'king', 'sword',
+         'journey', 'fellowship', 'shadow', 'light', 'song', 'road', 'gate', 'stone', 'star')
+
+TEMPLATE = '''<!DOCTYPE html>
+<html>
+<head>
+    <title> {{ Title }} </title>
+    <link href="/index.css" rel="stylesheet">
+</head>
+<body>
+    <article>
+        {{ Content }}
+    </article>
+</body>
+</html>'''
+
+def words(rng, count):
+    return ' '.join(rng.choice(WORDS) for _ in range(count))
+
+def inline_dense_paragraph(rng, spans):
+    parts = []
+    for i in range(spans):
+        kind = i % 6
+        text = words(rng, 2)
+        if kind == 0:
+            parts.append(f'**{text}**')
+        elif kind == 1:
+            parts.append(f'_{text}_')
+        elif kind == 2:
+            parts.append(f'`{text}`')
+        elif kind == 3:
+            parts.append(f'[{text}](/{rng.choice(WORDS)}/{i})')
+        elif kind == 4:
+            parts.append(f'![{text}](/images/{rng.choice(WORDS)}.png)')
+        else:
+            parts.append(text)
+    return ' '.join(parts)
+
+def link_heavy_paragraph(rng, links):
+    return ' '.join(f'[{rng.choice(WORDS)}](/{rng.choice(WORDS)}/{i})' for i in range(links))
+
+def huge_code_block(rng, lines):
+    body = '\n'.join(f'    {rng.choice(WORDS)}_{i} = "{words(rng, 3)}"  # **not bold**' for i in range(lines))
+    return f'```python\n{body}\n```'
+
+def long_list(rng, items, ordered=False):
+    if ordered:
+        return '\n'.join(f'{i + 1}. {words(rng, 4)} **{rng.choice(WORDS)}**' for i in range(items))
+    return '\n'.join(f'* {words(rng, 4)} _{rng.choice(WORDS)}_' for i in range(items))
+
+def quote(rng, lines):
+    return '\n'.join(f'> {words(rng, 8)}' for _ in range(lines))
+
+def page(rng, index, sections=6):
+    blocks = [f'# Page {index}: {words(rng, 3)}']
+    for section in range(sections):
+        blocks.append(f'## {words(rng, 3)}')
+        blocks.append(inline_dense_paragraph(rng, 30))
+        choice = rng.randrange(4)
+        if choice == 0:
+            blocks.append(long_list(rng, 10, ordered=section % 2 == 0))
+        elif choice == 1:
+            blocks.append(huge_code_block(rng, 15))
+        elif choice == 2:
+            blocks.append(quote(rng, 3))
+        else:
+            blocks.append(link_heavy_paragraph(rng, 20))
+    return '\n\n'.join(blocks)
+
+def large_document(seed=0, sections=2000):
+    rng = random.Random(seed)
+    return page(rng, 0, sections)
+
+def stress_document(seed=0, scale=1):
+    # one of everything the parser finds expensive, each scaled up
+    rng = random.Random(seed)
+    return '\n\n'.join([
+        '# Stress document',
+        inline_dense_paragraph(rng, 5000 * scale),
+        link_heavy_paragraph(rng, 5000 * scale),
+        huge_code_block(rng, 20000 * scale),
+        long_list(rng, 10000 * scale),
+        long_list(rng, 10000 * scale, ordered=True),
+    ])
+
+def write_corpus(root, pages=10000, seed=0, pages_per_directory=100):
+    rng = random.Random(seed)
+    content = os.path.join(root, 'content')
+    for index in range(pages):
+        directory = os.path.join(content, f'section{index // pages_per_directory}', f'page{index}')
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, 'index.md'), 'w') as file:
+            file.write(page(rng, index, sections=rng.randrange(2, 12)))
+    os.makedirs(os.path.join(root, 'static'), exist_ok=True)
+    with open(os.path.join(root, 'static', 'index.css'), 'w') as file:
+        file.write('body { margin: 0 }')
+    with open(os.path.join(root, 'template.html'), 'w') as file:
+        file.write(TEMPLATE)
+    return root
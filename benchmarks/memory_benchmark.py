@@ -0,0 +1,63 @@
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import corpus
+from markdown_converters.document import Document, StreamingDocument
+from markdown_converters.markdown_to_blocks import markdown_to_text_blocks
+from htmlnode import ParentNode
+
+def measure(label, func):
+    gc.collect()
+    blocks_before = sys.getallocatedblocks()
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc.collect()
+    retained_blocks = sys.getallocatedblocks() - blocks_before
+    print(f'{label:<12} peak {peak / 1024 / 1024:8.2f} MiB   retained allocations {retained_blocks:>10,}')
+    return result
+
+def footprint(obj):
+    size = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+def main():
+    parser = argparse.ArgumentParser(description='Peak memory and allocations for parsing a large synthetic document')
+    parser.add_argument('--sections', type=int, default=10000)
+    args = parser.parse_args()
+
+    markdown = corpus.large_document(sections=args.sections)
+    print(f'document: {len(markdown) / 1024 / 1024:.1f} MiB, {args.sections} sections')
+    text_blocks = measure('text blocks', lambda: markdown_to_text_blocks(markdown))
+    html_node = measure('html tree', lambda: ParentNode('div', [block.to_html_node() for block in text_blocks]))
+    measure('render', lambda: len(html_node.to_html()))
+    print(f'{"per object":<12} TextBlock {footprint(text_blocks[0])} B, '
+          f'TextNode {footprint(text_blocks[1].children[0])} B, '
+          f'ParentNode {footprint(html_node)} B, '
+          f'LeafNode {footprint(html_node.children[1].children[0])} B')
+
+    del text_blocks, html_node
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'large.md')
+        with open(path, 'w') as markdown_file:
+            markdown_file.write(markdown)
+        del markdown
+        with open(os.devnull, 'w') as output:
+            measure('in memory', lambda: output.writelines(_read_document(path).iter_html()))
+            measure('streamed', lambda: output.writelines(StreamingDocument(path).iter_html()))
+
+def _read_document(path):
+    with open(path, 'r') as markdown_file:
+        return Document(markdown_file.read())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC_DIR)
+
+import corpus
+from markdown_converters.block_memo import block_memo
+from markdown_converters.highlight import highlight_cache
+from markdown_converters.markdown_to_blocks import markdown_to_blocks, block_to_block_type, markdown_to_html_nodes
+from markdown_converters.markdown_to_text_node import textnodes_from_markdown
+from site_builder.pages import generate_page, generate_pages_recursive
+from site_builder.template import clear_template_cache
+
+def clear_caches():
+    # the in-process caches a build fills, so a timed repeat starts as cold as a fresh process
+    block_memo.clear()
+    highlight_cache.clear()
+    clear_template_cache()
+
+def timed(func, repeats, cold=True):
+    # cold clears the caches before every repeat; otherwise the first, untimed, call warms them
+    if not cold:
+        func()
+    timings = []
+    for _ in range(repeats):
+        if cold:
+            clear_caches()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {'min': min(timings), 'median': statistics.median(timings), 'repeats': repeats}
+
+def run(args):
+    document = corpus.large_document(args.seed, args.sections)
+    blocks = markdown_to_blocks(document)
+    rng = random.Random(args.seed)
+    dense = corpus.inline_dense_paragraph(rng, 20000)
+    links = corpus.link_heavy_paragraph(rng, 20000)
+    html_node = markdown_to_html_nodes(document)
+
+    results = {}
+    results['markdown_to_blocks'] = timed(lambda: markdown_to_blocks(document), args.repeats)
+    results['block_to_block_type'] = timed(lambda: list(map(block_to_block_type, blocks)), args.repeats)
+    results['textnodes_from_markdown.dense'] = timed(lambda: textnodes_from_markdown(dense), args.repeats)
+    results['textnodes_from_markdown.links'] = timed(lambda: textnodes_from_markdown(links), args.repeats)
+    results['HTMLNode.to_html'] = timed(html_node.to_html, args.repeats)
+
+    with tempfile.TemporaryDirectory() as root:
+        corpus.write_corpus(root, args.pages, args.seed)
+        source = os.path.join(root, 'document.md')
+        with open(source, 'w') as file:
+            file.write(document)
+        template = os.path.join(root, 'template.html')
+        page = lambda: generate_page(source, template, os.path.join(root, 'document.html'), '/')
+        build = lambda: generate_pages_recursive(os.path.join(root, 'content/'), template, os.path.join(root, 'docs/'),
+                                                 '/', args.jobs)
+        results['generate_page'] = timed(page, args.repeats)
+        results['generate_page.memo_warm'] = timed(page, args.repeats, cold=False)
+        results['full_build'] = timed(build, max(1, args.repeats // 2))
+        # worker processes start with empty caches, so only a serial build can reuse them
+        if args.jobs == 1:
+            results['full_build.memo_warm'] = timed(build, max(1, args.repeats // 2), cold=False)
+    for name in ('full_build', 'full_build.memo_warm'):
+        if name in results:
+            results[name]['pages'] = args.pages
+    results['startup'] = timed(lambda: subprocess.run([sys.executable, os.path.join(SRC_DIR, 'main.py'), '--help'],
+                                                      stdout=subprocess.DEVNULL, check=True), args.repeats)
+    return results
+
+def metadata(args):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ''
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'seed': args.seed,
+        'sections': args.sections,
+        'pages': args.pages,
+        'jobs': args.jobs,
+    }
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path) as file:
+        baseline = json.load(file)['results']
+    regressions = []
+    print(f'{"benchmark":<32}{"baseline":>12}{"current":>12}{"ratio":>8}')
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result['min'] / baseline[name]['min']
+        flag = ''
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f'{name:<32}{baseline[name]["min"]:>12.4f}{result["min"]:>12.4f}{ratio:>8.2f}{flag}')
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Time each pipeline stage on a deterministic synthetic corpus')
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--compare', help='results file of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed slowdown before failing, 0.2 = 20%%')
+    parser.add_argument('--pages', type=int, default=10000)
+    parser.add_argument('--sections', type=int, default=2000)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--jobs', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--startup-budget', type=float, default=0.15,
+                        help='maximum median seconds for interpreter start plus importing main')
+    args = parser.parse_args()
+
+    results = run(args)
+    for name, result in results.items():
+        print(f'{name:<32} min {result["min"]:.4f}s  median {result["median"]:.4f}s')
+    with open(args.output, 'w') as file:
+        json.dump({'meta': metadata(args), 'results': results}, file, indent=2)
+
+    failed = False
+    if results['startup']['median'] > args.startup_budget:
+        print(f'startup took {results["startup"]["median"]:.4f}s, over the budget of {args.startup_budget:.4f}s')
+        failed = True
+    if args.compare and compare(results, args.compare, args.threshold):
+        failed = True
+    if failed:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
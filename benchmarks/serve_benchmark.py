@@ -0,0 +1,72 @@
+import argparse
+import http.client
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import corpus
+from site_builder.serve import SiteServer
+
+def client(port, paths, latencies):
+    # one keep-alive connection per client thread, like a browser tab
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    for path in paths:
+        start = time.perf_counter()
+        connection.request('GET', path)
+        response = connection.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        if response.status != 200:
+            raise Exception(f'{path}: {response.status}')
+    connection.close()
+
+def run(port, paths, clients):
+    latencies = []
+    threads = [threading.Thread(target=client, args=(port, paths[index::clients], latencies)) for index in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, sorted(latencies)
+
+def report(label, seconds, latencies):
+    def percentile(share):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * share))] * 1000
+    print(f'{label:<8} {len(latencies) / seconds:9.0f} req/s   p50 {percentile(0.5):7.2f} ms   '
+          f'p95 {percentile(0.95):7.2f} ms   p99 {percentile(0.99):7.2f} ms   mean {statistics.mean(latencies) * 1000:7.2f} ms')
+
+def main():
+    parser = argparse.ArgumentParser(description='Throughput and latency of --serve against a local client')
+    parser.add_argument('--pages', type=int, default=500)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--warm-rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        corpus.write_corpus(root, args.pages)
+        site = SiteServer(os.path.join(root, 'content', ''), os.path.join(root, 'static', ''),
+                          os.path.join(root, 'template.html'), max_pages=args.pages)
+        server = site.make_server(port=0)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            port = server.server_address[1]
+            paths = [f'/section{index // 100}/page{index}/' for index in range(args.pages)]
+            print(f'{args.pages} pages, {args.clients} clients')
+            report('cold', *run(port, paths, args.clients))
+            report('warm', *run(port, paths * args.warm_rounds, args.clients))
+            report('static', *run(port, ['/index.css'] * args.pages * args.warm_rounds, args.clients))
+            print(f'renders: {site.pages.renders}')
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+import logging
+import os
+import struct
+import tempfile
+import unittest
+import zlib
+
+from markdown_converters.block_memo import block_memo
+from markdown_converters.highlight import highlight_cache
+from site_builder.images import PNG_SIGNATURE
+from site_builder.template import clear_template_cache
+from textnode import set_image_sizes
+
+# Shared by the test modules; not named test_* so unittest discovery does not collect it.
+
+TEMPLATE = '<title>{{ Title }}</title>{{ Content }}'
+
+def write_file(path, data, touch=False):
+    # Writes text or bytes to path, creating its directory. touch moves the mtime of a file that already existed
+    # a second forward, so a change is seen by anything that compares mtimes even on coarse filesystem clocks.
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    mtime = os.stat(path).st_mtime_ns if touch and os.path.exists(path) else None
+    with open(path, 'wb' if isinstance(data, bytes) else 'w') as file:
+        file.write(data)
+    if mtime is not None:
+        os.utime(path, ns=(mtime + 1_000_000_000, mtime + 1_000_000_000))
+
+def read_file(path):
+    with open(path) as file:
+        return file.read()
+
+def read_tree(path):
+    # relative path -> bytes of every file under path
+    tree = {}
+    for root, _, names in os.walk(path):
+        for name in names:
+            with open(os.path.join(root, name), 'rb') as file:
+                tree[os.path.relpath(os.path.join(root, name), path)] = file.read()
+    return tree
+
+def chunk(chunk_type, body):
+    return struct.pack('>I', len(body)) + chunk_type + body + struct.pack('>I', zlib.crc32(chunk_type + body))
+
+def make_png(width=40, height=30, extra_chunks=(), level=0):
+    rows = b''.join(b'\x00' + bytes((x * 7 + y) % 256 for x in range(width)) for y in range(height))
+    data = zlib.compress(rows, level)
+    return (PNG_SIGNATURE + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0))
+            + b''.join(extra_chunks) + chunk(b'IDAT', data[:len(data) // 2]) + chunk(b'IDAT', data[len(data) // 2:])
+            + chunk(b'IEND', b''))
+
+def restore_global_state(test_case):
+    # For tests that run main.main() in-process: after the test, puts back the process-wide state a build changes,
+    # the root logger's handlers and level, the block memo and highlight cache sizes and contents, the image sizes
+    # and the compiled templates, so it does not leak into later tests.
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    memo_entries, highlight_entries = block_memo.max_entries, highlight_cache.max_entries
+
+    def restore():
+        root.handlers[:] = handlers
+        root.setLevel(level)
+        block_memo.max_entries = memo_entries
+        block_memo.clear()
+        highlight_cache.max_entries = highlight_entries
+        highlight_cache.clear()
+        set_image_sizes({})
+        clear_template_cache()
+    test_case.addCleanup(restore)
+
+class TempDirTestCase(unittest.TestCase):
+    # self.root is a temporary directory, ending in a slash, that is removed after every test
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = self.tmp.name + '/'
+
+    def write(self, relative_path, data, touch=False):
+        write_file(self.root + relative_path, data, touch)
+
+    def read(self, relative_path):
+        return read_file(self.root + relative_path)
+
+    def write_site(self, pages, static=None, template=TEMPLATE):
+        # template.html, content/ from pages and static/ from static, both relative path -> text
+        self.write('template.html', template)
+        for relative_path, text in pages.items():
+            self.write('content/' + relative_path, text)
+        for relative_path, text in (static or {}).items():
+            self.write('static/' + relative_path, text)
@@ -1,31 +1,73 @@
+_URL_PROPS = ('href', 'src')
+
+def resolve_url(url, basepath):
+    if basepath is None or not url.startswith('/') or url.startswith('//'):
+        return url
+    return basepath + url[1:]
+
+def _prop_value(name, value, basepath):
+    if name in _URL_PROPS and isinstance(value, str):
+        return resolve_url(value, basepath)
+    return value
+
 class HTMLNode():
+    __slots__ = ('tag', 'value', 'children', 'props', '_props_html')
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
         self.children = children
         self.props = props
+        self._props_html = None
+
+    def to_html(self, basepath=None):
+        return ''.join(self.iter_html(basepath))
 
-    def to_html(self):
+    def write_html(self, fp, basepath=None):
+        fp.writelines(self.iter_html(basepath))
+
+    def iter_html(self, basepath=None):
+        # Walks the tree with an explicit stack, so deeply nested trees cannot hit the recursion limit.
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                yield node
+                continue
+            opening, children, closing = node._html_parts(basepath)
+            yield opening
+            if children is not None:
+                stack.append(closing)
+                stack.extend(reversed(children))
+
+    def _html_parts(self, basepath):
         raise NotImplementedError()
 
-    def props_to_html(self):
-        if self.props is None:
-            return ''
-        return ''.join(list(map(lambda item: f' {item[0]}="{item[1]}"', self.props.items())))
+    def props_to_html(self, basepath=None):
+        # cached together with the basepath that site-absolute href/src values were resolved against
+        if self._props_html is None or self._props_html[0] != basepath:
+            if self.props is None:
+                html = ''
+            else:
+                html = ''.join(map(lambda item: f' {item[0]}="{_prop_value(item[0], item[1], basepath)}"', self.props.items()))
+            self._props_html = (basepath, html)
+        return self._props_html[1]
 
     def __repr__(self):
         return f'HTMLNode({self.tag}, {self.value}, {self.children}, {self.props})'
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag=None, value=None, props=None):
         super().__init__(tag=tag, value=value, props=props)
 
-    def to_html(self):
+    def _html_parts(self, basepath):
         if self.value is None:
             raise ValueError('value cannot be None')
         if self.tag is None or self.tag == '':
-            return self.value
-        return f'<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>'
+            return self.value, None, None
+        return f'<{self.tag}{self.props_to_html(basepath)}>{self.value}</{self.tag}>', None, None
 
     def __repr__(self):
         return f'LeafNode({self.tag}, {self.value}, {self.props})'
@@ -34,18 +76,20 @@ class LeafNode(HTMLNode):
         return self.tag == other.tag and self.value == other.value and self.props == other.props
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag=tag, children=children, props=props)
 
-    def to_html(self):
+    def _html_parts(self, basepath):
         if self.tag is None or self.tag == '':
             raise ValueError('tag cannot be None or empty')
         if self.children is None or len(self.children) == 0:
             raise ValueError('children cannot be None or empty')
-        return f'<{self.tag}{self.props_to_html()}>{''.join(list(map(lambda child: child.to_html(), self.children)))}</{self.tag}>'
+        return f'<{self.tag}{self.props_to_html(basepath)}>', self.children, f'</{self.tag}>'
 
     def __repr__(self):
         return f'ParentNode({self.tag}, {self.children}, {self.props})'
 
     def __eq__(self, other):
-        return self.tag == other.tag and self.children == other.children and self.props == other.props
\ No newline at end of file
+        return self.tag == other.tag and self.children == other.children and self.props == other.props
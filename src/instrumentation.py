@@ -0,0 +1,158 @@
+import threading
+import time
+import tracemalloc
+
+_active = None
+
+class _NullPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_PHASE = _NullPhase()
+
+def activate(profiler):
+    global _active
+    _active = profiler
+    if profiler.trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+def deactivate():
+    global _active
+    profiler, _active = _active, None
+    if profiler is not None and profiler.trace_memory and tracemalloc.is_tracing():
+        profiler.peak_memory = max(profiler.peak_memory, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return profiler
+
+def active():
+    return _active
+
+def phase(name):
+    # a shared no-op context manager while no profiler is active, so instrumented code costs next to nothing
+    if _active is None:
+        return _NULL_PHASE
+    return _Phase(_active, name)
+
+def page(name):
+    if _active is None:
+        return _NULL_PHASE
+    return _Page(_active, name)
+
+def count(name, amount=1):
+    if _active is not None:
+        _active.counters[name] = _active.counters.get(name, 0) + amount
+
+class Profiler:
+    # Phase times are exclusive: time spent in a nested phase is only counted for the innermost one.
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.phases = {}
+        self.calls = {}
+        self.counters = {}
+        self.pages = {}
+        self.peak_memory = 0
+        self.started = time.perf_counter()
+        self._local = threading.local()
+        self._page = None
+
+    @property
+    def _stack(self):
+        # per thread, so phases timed on the asset and compression thread pools nest correctly
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _enter(self, name):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def _exit(self):
+        name, start, nested = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        self.phases[name] = self.phases.get(name, 0.0) + elapsed - nested
+        self.calls[name] = self.calls.get(name, 0) + 1
+        if self._stack:
+            self._stack[-1][2] += elapsed
+        if self._page is not None:
+            self._page['phases'][name] = self._page['phases'].get(name, 0.0) + elapsed - nested
+
+    def snapshot(self):
+        return {
+            'phases': self.phases,
+            'calls': self.calls,
+            'counters': self.counters,
+            'pages': self.pages,
+            'peak_memory': self.peak_memory,
+        }
+
+    def merge(self, snapshot):
+        for name, seconds in snapshot['phases'].items():
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+        for name, calls in snapshot['calls'].items():
+            self.calls[name] = self.calls.get(name, 0) + calls
+        for name, amount in snapshot['counters'].items():
+            self.counters[name] = self.counters.get(name, 0) + amount
+        self.pages.update(snapshot['pages'])
+        self.peak_memory = max(self.peak_memory, snapshot['peak_memory'])
+
+    def report(self, slowest=20):
+        phase_total = sum(self.phases.values())
+        pages = sorted(self.pages.items(), key=lambda item: item[1]['seconds'], reverse=True)
+        return {
+            'wall_seconds': time.perf_counter() - self.started,
+            'phase_seconds': phase_total,
+            'phases': {
+                name: {
+                    'seconds': seconds,
+                    'calls': self.calls[name],
+                    'share': seconds / phase_total if phase_total else 0.0,
+                }
+                for name, seconds in sorted(self.phases.items(), key=lambda item: item[1], reverse=True)
+            },
+            'counters': self.counters,
+            'peak_memory': self.peak_memory if self.trace_memory else None,
+            'pages': len(self.pages),
+            'slowest_pages': [dict(page=name, **stats) for name, stats in pages[:slowest]],
+        }
+
+class _Phase:
+    __slots__ = ('profiler', 'name')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler._enter(self.name)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler._exit()
+        return False
+
+class _Page:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler._page = {'seconds': 0.0, 'phases': {}}
+        if self.profiler.trace_memory:
+            tracemalloc.reset_peak()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        stats = self.profiler._page
+        stats['seconds'] = time.perf_counter() - self.start
+        if self.profiler.trace_memory:
+            stats['peak_memory'] = tracemalloc.get_traced_memory()[1]
+            self.profiler.peak_memory = max(self.profiler.peak_memory, stats['peak_memory'])
+        self.profiler.pages[self.name] = stats
+        self.profiler._page = None
+        return False
@@ -1,68 +1,203 @@
+import argparse
+import json
+import logging
 import os
 import shutil
-import sys
-
-from markdown_converters.markdown_to_blocks import markdown_to_html_nodes, extract_title
-from textnode import TextNode, TextType
-
-def copy(src, dest):
-    if not os.path.exists(dest):
-        os.makedirs(dest)
-
-    for entry in os.listdir(src):
-        print(entry)
-        if os.path.isfile(src + entry):
-            print('is file')
-            shutil.copyfile(src + entry, dest + entry)
-        elif os.path.isdir(src + entry):
-            print('is directory')
-            copy(src + entry + '/', dest + entry + '/')
-
-def generate_page(from_path, template_path, dest_path, basepath):
-    print(f'Generating page from {from_path} to {dest_path} using {template_path}')
-    with open(from_path, 'r') as markdown_file:
-        markdown = markdown_file.read()
-        with open(template_path, 'r') as template_path:
-            html_node = markdown_to_html_nodes(markdown)
-            html = html_node.to_html()
-            title = extract_title(markdown)
-
-            content = template_path.read().replace('{{ Title }}', title)
-            content = content.replace('{{ Content }}', html)
-            content = content.replace('href="/', 'href="' + basepath)
-            content = content.replace('src="/', 'src="' + basepath)
-
-            with open(dest_path, 'w') as output_file:
-                output_file.write(content)
-
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath):
-    if not os.path.exists(dest_dir_path):
-        os.makedirs(dest_dir_path)
-    for entry in os.listdir(dir_path_content):
-        print(entry)
-        if os.path.isfile(dir_path_content + entry):
-            generate_page(dir_path_content + entry, template_path, dest_dir_path + entry.replace('.md', '.html'), basepath)
-        elif os.path.isdir(dir_path_content + entry):
-            generate_pages_recursive(dir_path_content + entry + '/', template_path, dest_dir_path + entry + '/', basepath)
-
-def main():
-    text_node = TextNode('This is a text node', TextType.BOLD, 'https://www.boot.dev')
-    print(text_node)
-    destDir = 'docs'
-
-    if os.path.exists(destDir):
-        shutil.rmtree(destDir)
-
-    if not os.path.exists('static'):
-        raise Exception('static folder not found')
-
-    args = sys.argv
-    basepath = '/'
-    if len(args) > 1:
-        basepath = args[1]
-
-    copy('static/', destDir + '/')
-
-    generate_pages_recursive('content/', 'template.html', destDir + '/', basepath)
-
-main()
\ No newline at end of file
+
+logger = logging.getLogger(__name__)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Generate the static site from markdown content.')
+    parser.add_argument('basepath', nargs='?', default='/',
+                        help='path the site is served under, prefixed to root-relative urls (default: /)')
+    parser.add_argument('--content', default='content', metavar='DIR', help='markdown sources (default: content)')
+    parser.add_argument('--static', default='static', metavar='DIR', help='static files to copy (default: static)')
+    parser.add_argument('--template', default='template.html', metavar='FILE',
+                        help='page template (default: template.html)')
+    parser.add_argument('-o', '--output', default='docs', metavar='DIR', help='output directory (default: docs)')
+    parser.add_argument('--cache-dir', default='.cache', metavar='DIR',
+                        help='build manifests and the parse cache (default: .cache)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='only regenerate pages whose source, template or basepath changed')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='number of worker processes used to generate pages, 0 uses all cores')
+    parser.add_argument('--asset-mode', choices=('copy', 'hardlink', 'reflink'), default='copy',
+                        help='how static files are placed in the output directory')
+    parser.add_argument('--no-optimize-images', action='store_true',
+                        help='copy PNGs as they are instead of recompressing them and adding their size to <img> tags')
+    parser.add_argument('--no-compress', action='store_true',
+                        help='do not write precompressed .gz (and .br/.zst when available) copies of text outputs')
+    parser.add_argument('--compress-min-size', type=int, default=1024, metavar='BYTES',
+                        help='outputs smaller than this are not precompressed (default: 1024)')
+    parser.add_argument('--parse-cache-size', type=int, default=256, metavar='MB',
+                        help='size limit of the on-disk parse cache')
+    parser.add_argument('--no-parse-cache', action='store_true',
+                        help='always parse markdown instead of loading parsed blocks from the cache')
+    parser.add_argument('--block-memo-size', type=int, default=4096, metavar='BLOCKS',
+                        help='number of distinct blocks whose rendered html is shared between pages (0 disables)')
+    parser.add_argument('--no-search', action='store_true',
+                        help='do not write the client-side search index to <output>/search')
+    parser.add_argument('--check-links', action='store_true',
+                        help='report broken internal links and orphan pages, and fail the build on broken links')
+    parser.add_argument('--prefetch', type=int, default=0, metavar='N',
+                        help='fill {{ Prefetch }} in the template with prefetch hints for the N most linked pages')
+    parser.add_argument('--in-place', action='store_true',
+                        help='write into the output directory directly instead of building a staging copy and '
+                             'swapping it in when the build succeeds')
+    parser.add_argument('--shard', type=_shard, metavar='INDEX/COUNT',
+                        help='only generate the pages assigned to this shard, and write a shard manifest for --merge')
+    parser.add_argument('--merge', nargs='+', metavar='SHARD_DIR',
+                        help='combine the output directories of all --shard builds into the output directory')
+    parser.add_argument('--watch', action='store_true',
+                        help='keep running and rebuild affected outputs when content, static files or the template change')
+    parser.add_argument('--serve', action='store_true',
+                        help='serve the site, rendering each page when it is first requested instead of building')
+    parser.add_argument('--host', default='127.0.0.1', help='address --serve listens on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8888, help='port --serve listens on (default: 8888)')
+    parser.add_argument('--profile', metavar='REPORT',
+                        help='write a JSON report with per-phase timings and the slowest pages to REPORT')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help='also record peak memory with tracemalloc while profiling')
+    parser.add_argument('-v', '--verbose', action='store_const', dest='log_level', const=logging.DEBUG,
+                        default=logging.INFO, help='log every generated page')
+    parser.add_argument('-q', '--quiet', action='store_const', dest='log_level', const=logging.WARNING,
+                        help='only log warnings and errors')
+    return parser.parse_args(argv)
+
+def _shard(text):
+    from site_builder.shards import parse_shard
+    try:
+        return parse_shard(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=args.log_level, format='%(message)s')
+
+    # the build modules are imported here, so importing main or running --help stays cheap
+    import instrumentation
+    from markdown_converters.block_memo import block_memo
+    from site_builder.assets import sync_assets
+    from site_builder.compress import compress_outputs
+    from site_builder.images import ImageOptimizer
+    from site_builder.link_graph import BrokenLinksError, build_link_graph, prefetch_hints
+    from site_builder.pages import generate_pages_recursive, generate_pages_incremental, remove_stale_pages
+    from site_builder.parse_cache import ParseCache
+    from site_builder.publish import publish, stage
+    from site_builder.search_index import SearchIndex, build_search_index
+    from site_builder.shards import merge_shards, write_shard_manifest
+    from textnode import set_image_sizes
+
+    content_dir = os.path.join(args.content, '')
+    static_dir = os.path.join(args.static, '')
+    dest_dir = os.path.join(args.output, '')
+    build_manifest = os.path.join(args.cache_dir, 'build_manifest.json')
+    asset_manifest = os.path.join(args.cache_dir, 'asset_manifest.json')
+    search_manifest = os.path.join(args.cache_dir, 'search_index.json')
+    compress_manifest = os.path.join(args.cache_dir, 'compress_manifest.json')
+    compress_cache = os.path.join(args.cache_dir, 'compressed')
+    publish_dir = os.path.join(args.cache_dir, 'publish')
+
+    basepath = args.basepath
+    block_memo.max_entries = args.block_memo_size
+    parse_cache = None
+    if not args.no_parse_cache:
+        parse_cache = ParseCache(os.path.join(args.cache_dir, 'parse'), args.parse_cache_size * 1024 * 1024)
+
+    if args.serve:
+        from site_builder.serve import SiteServer
+        server = SiteServer(content_dir, static_dir, args.template, basepath, parse_cache)
+        server.serve_forever(args.host, args.port)
+        return
+
+    if not args.merge and not os.path.exists(static_dir):
+        raise Exception(f'static folder not found: {args.static}')
+
+    # builds go to a staging directory that replaces the output directory once complete; watch mode and shard
+    # builds, whose output is merged later, write in place. Either way the previous output is kept, so unchanged
+    # assets and compressed copies are skipped, and only pages without a source are removed. Merges start empty.
+    in_place = args.in_place or args.watch or args.shard is not None
+    if in_place:
+        build_dir = dest_dir
+        if args.merge and os.path.exists(dest_dir):
+            shutil.rmtree(dest_dir)
+    else:
+        build_dir = stage(dest_dir, seed=not args.merge)
+
+    if args.merge:
+        merge_shards(args.merge, build_dir, args.asset_mode)
+        if not args.no_compress:
+            compress_outputs(build_dir, compress_manifest, compress_cache, min_size=args.compress_min_size,
+                             link_mode=args.asset_mode)
+        if not in_place:
+            publish(build_dir, dest_dir, publish_dir)
+        return
+
+    if os.path.isdir(build_dir):
+        remove_stale_pages(content_dir, static_dir, build_dir, args.shard)
+
+    image_optimizer = None if args.no_optimize_images else ImageOptimizer(os.path.join(args.cache_dir, 'images'))
+
+    if args.watch:
+        from site_builder.watch import SiteWatcher
+        search_index = None if args.no_search else SearchIndex.load(search_manifest)
+        watcher = SiteWatcher(content_dir, static_dir, args.template, dest_dir, basepath, asset_manifest, parse_cache,
+                              search_index, image_optimizer)
+        watcher.build()
+        watcher.run()
+        return
+
+    if args.profile:
+        instrumentation.activate(instrumentation.Profiler(trace_memory=args.profile_memory))
+
+    with instrumentation.phase('assets'):
+        asset_stats = sync_assets(static_dir, build_dir, asset_manifest, link_mode=args.asset_mode,
+                                  image_optimizer=image_optimizer)
+    set_image_sizes(asset_stats.image_sizes)
+
+    # search, link checks and compression are whole-site steps: the first shard writes the search index, and
+    # outputs are compressed when the shards are merged
+    first_shard = args.shard is None or args.shard[0] == 0
+    try:
+        link_graph = None
+        extra_values = None
+        if args.check_links or args.prefetch:
+            link_graph = build_link_graph(content_dir, build_dir, static_dir, parse_cache)
+            if args.prefetch:
+                extra_values = {'Prefetch': prefetch_hints(link_graph, basepath, args.prefetch)}
+        if args.incremental:
+            generate_pages_incremental(content_dir, args.template, build_dir, basepath, build_manifest, args.jobs,
+                                       parse_cache, extra_values, args.shard)
+        else:
+            generate_pages_recursive(content_dir, args.template, build_dir, basepath, args.jobs, parse_cache,
+                                     extra_values, args.shard)
+        if not args.no_search and first_shard:
+            build_search_index(content_dir, build_dir, basepath, search_manifest, parse_cache)
+        if args.shard is not None:
+            write_shard_manifest(build_dir, args.shard)
+        elif not args.no_compress:
+            compress_outputs(build_dir, compress_manifest, compress_cache, min_size=args.compress_min_size,
+                             link_mode=args.asset_mode)
+        if args.jobs == 1:
+            # worker processes have their own memo; their hits show up in the --profile counters
+            logger.info('%s', block_memo.stats)
+        if args.check_links and first_shard and link_graph.broken:
+            raise BrokenLinksError(link_graph.broken)
+        if not in_place:
+            with instrumentation.phase('publish'):
+                publish(build_dir, dest_dir, publish_dir)
+    finally:
+        if args.profile:
+            write_profile(instrumentation.deactivate(), args.profile)
+
+def write_profile(profiler, path):
+    report = profiler.report()
+    with open(path, 'w') as report_file:
+        json.dump(report, report_file, indent=2)
+    logging.info('Profile written to %s (%.3fs wall)', path, report['wall_seconds'])
+    for name, stats in report['phases'].items():
+        logging.info('  %-10s %8.3fs %5.1f%%', name, stats['seconds'], stats['share'] * 100)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+import instrumentation
+from markdown_converters.lru import LRUCache
+
+
+class _Entry:
+    __slots__ = ('key', 'block', 'html_node', 'fragments')
+
+    def __init__(self, key, block):
+        self.key = key
+        self.block = block
+        self.html_node = None
+        self.fragments = {}
+
+class BlockMemo(LRUCache):
+    # Bounded LRU of parsed blocks keyed by their normalized markdown text. Identical blocks on different
+    # pages share one TextBlock, its html node and its rendered html per basepath. Blocks longer than
+    # max_block_length are rarely repeated and would crowd out the small ones, so they are not memoized.
+    def __init__(self, max_entries=4096, max_block_length=16 * 1024):
+        super().__init__('block_memo', max_entries)
+        self.max_block_length = max_block_length
+        self._by_block = {}
+
+    def text_block(self, key, build, *args):
+        if len(key) > self.max_block_length:
+            return build(*args)
+        return self.get(key, _build_entry, key, build, args).block
+
+    def html_node(self, block):
+        entry = self._entry(block)
+        if entry is None:
+            return _build_html_node(block)
+        if entry.html_node is None:
+            entry.html_node = _build_html_node(block)
+        return entry.html_node
+
+    def to_html(self, block, basepath=None):
+        entry = self._entry(block)
+        if entry is None:
+            return _build_html_node(block).to_html(basepath)
+        fragment = entry.fragments.get(basepath)
+        if fragment is None:
+            fragment = self.html_node(block).to_html(basepath)
+            entry.fragments[basepath] = fragment
+        return fragment
+
+    def _entry(self, block):
+        # blocks are found by identity, so a block that was evicted (or never memoized) is rendered directly
+        entry = self._by_block.get(id(block))
+        if entry is not None and entry.block is block:
+            return entry
+        return None
+
+    def _added(self, entry):
+        self._by_block[id(entry.block)] = entry
+
+    def _evicted(self, entry):
+        del self._by_block[id(entry.block)]
+
+    def _cleared(self):
+        self._by_block.clear()
+
+def _build_entry(key, build, args):
+    return _Entry(key, build(*args))
+
+def _build_html_node(block):
+    with instrumentation.phase('tree'):
+        return block.to_html_node()
+
+block_memo = BlockMemo()
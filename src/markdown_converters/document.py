@@ -0,0 +1,123 @@
+from functools import cached_property
+
+import instrumentation
+from htmlnode import ParentNode
+from markdown_converters.block_memo import block_memo
+from markdown_converters.markdown_to_blocks import BlockType, text_blocks_from_lines
+from markdown_converters.markdown_to_text_node import references_from_text_nodes
+from textnode import TextNode
+
+
+def extract_title(markdown_text):
+    return Document(markdown_text).title
+
+class Document:
+    # Parses the markdown at most once; every property is computed on first access and cached.
+    streaming = False
+
+    def __init__(self, markdown_text, blocks=None):
+        self.markdown_text = markdown_text
+        if blocks is not None:
+            self.blocks = blocks
+
+    @cached_property
+    def blocks(self):
+        with instrumentation.phase('blocks'):
+            blocks = list(text_blocks_from_lines(self.markdown_text.splitlines()))
+        instrumentation.count('blocks', len(blocks))
+        return blocks
+
+    @cached_property
+    def title(self):
+        # without parsed blocks, only scan up to the first h1
+        blocks = self.__dict__.get('blocks')
+        if blocks is None:
+            blocks = text_blocks_from_lines(self.markdown_text.splitlines())
+        return _first_title(blocks)
+
+    @cached_property
+    def headings(self):
+        return [(block.additional_info, plain_text(block.children))
+                for block in self.blocks if block.block_type == BlockType.HEADING]
+
+    @cached_property
+    def references(self):
+        # (images, links) collected in one walk over the parsed blocks
+        return references_from_text_nodes(self.text_nodes())
+
+    @property
+    def links(self):
+        return self.references[1]
+
+    @property
+    def images(self):
+        return self.references[0]
+
+    @cached_property
+    def html_node(self):
+        with instrumentation.phase('tree'):
+            return ParentNode(tag='div', children=list(map(block_memo.html_node, self.blocks)))
+
+    def iter_html(self, basepath=None):
+        # same output as html_node.iter_html, but blocks shared with other pages are rendered only once
+        yield '<div>'
+        for block in self.blocks:
+            yield block_memo.to_html(block, basepath)
+        yield '</div>'
+
+    def iter_blocks(self):
+        return iter(self.blocks)
+
+    def text_nodes(self):
+        for block in self.blocks:
+            yield from _flatten(block.children)
+
+class StreamingDocument:
+    # A markdown file that is converted block by block while it is read, so memory use is bounded by the
+    # largest block rather than the size of the file. The file is read twice: up to the h1 for the title,
+    # then in full while the html is written. Its blocks bypass the block memo, which would otherwise keep
+    # thousands of them alive.
+    streaming = True
+
+    def __init__(self, path):
+        self.path = path
+
+    @cached_property
+    def title(self):
+        with open(self.path, 'r') as markdown_file:
+            return _first_title(text_blocks_from_lines(_file_lines(markdown_file), memoize=False))
+
+    @cached_property
+    def references(self):
+        return references_from_text_nodes(node for block in self.iter_blocks() for node in _flatten(block.children))
+
+    def iter_blocks(self):
+        with open(self.path, 'r') as markdown_file:
+            yield from text_blocks_from_lines(_file_lines(markdown_file), memoize=False)
+
+    def iter_html(self, basepath=None):
+        yield '<div>'
+        with open(self.path, 'r') as markdown_file:
+            for block in text_blocks_from_lines(_file_lines(markdown_file), memoize=False):
+                instrumentation.count('blocks')
+                yield block_memo.to_html(block, basepath)
+        yield '</div>'
+
+def _file_lines(markdown_file):
+    return map(lambda line: line.rstrip('\n'), markdown_file)
+
+def _first_title(blocks):
+    for block in blocks:
+        if block.block_type == BlockType.HEADING and block.additional_info == 1:
+            return plain_text(block.children)
+    raise Exception('markdown does not contain a h1 heading')
+
+def _flatten(children):
+    for child in children:
+        if isinstance(child, TextNode):
+            yield child
+        else:
+            yield from _flatten(child)
+
+def plain_text(children):
+    return ''.join(map(lambda node: node.text, _flatten(children)))
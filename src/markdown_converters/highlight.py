@@ -0,0 +1,127 @@
+import hashlib
+import re
+from html import escape
+
+import instrumentation
+from markdown_converters.lru import LRUCache
+
+# Token classes, styled by the .tok-* rules in static/index.css.
+KEYWORD = 'kw'
+STRING = 'str'
+COMMENT = 'com'
+NUMBER = 'num'
+LITERAL = 'lit'
+TAG = 'tag'
+
+_NUMBER = r'\b(?:0[xX][0-9a-fA-F_]+|\d[\d_]*(?:\.\d+)?(?:[eE][+-]?\d+)?)'
+
+class Language:
+    # A lexer is one regex of alternatives tried left to right; every alternative either matches or falls
+    # through at the current position, and unterminated strings and comments run to the end of their line or
+    # of the code, so tokenizing stays linear in the length of the code.
+    def __init__(self, rules, keywords=(), literals=()):
+        self.rules = rules
+        self.keywords = frozenset(keywords)
+        self.literals = frozenset(literals)
+        self._pattern = re.compile('|'.join(f'(?P<{name}>{pattern})' for name, pattern in
+                                            (('t' + str(index), rule[1]) for index, rule in enumerate(rules))))
+
+    def tokenize(self, code):
+        # (token class or None, text) spans covering all of code
+        spans = []
+        position = 0
+        for match in self._pattern.finditer(code):
+            if match.start() > position:
+                spans.append((None, code[position:match.start()]))
+            text = match.group()
+            token_class = self.rules[int(match.lastgroup[1:])][0]
+            if token_class is None:
+                token_class = KEYWORD if text in self.keywords else LITERAL if text in self.literals else None
+            spans.append((token_class, text))
+            position = match.end()
+        if position < len(code):
+            spans.append((None, code[position:]))
+        return spans
+
+def _strings(*quotes):
+    return '|'.join(f'{re.escape(quote)}(?:[^{re.escape(quote)}\\\\\\n]|\\\\.)*{re.escape(quote)}?' for quote in quotes)
+
+_C_COMMENTS = r'//[^\n]*|/\*[\s\S]*?(?:\*/|\Z)'
+
+_PYTHON = Language(
+    [(COMMENT, r'#[^\n]*'),
+     (STRING, r'[rRbBuUfF]{0,2}(?:"""[\s\S]*?(?:"""|\Z)|\'\'\'[\s\S]*?(?:\'\'\'|\Z)|' + _strings('"', "'") + ')'),
+     (NUMBER, _NUMBER),
+     (None, r'[A-Za-z_]\w*')],
+    keywords=('and', 'as', 'assert', 'async', 'await', 'break', 'class', 'continue', 'def', 'del', 'elif', 'else',
+              'except', 'finally', 'for', 'from', 'global', 'if', 'import', 'in', 'is', 'lambda', 'match', 'case',
+              'nonlocal', 'not', 'or', 'pass', 'raise', 'return', 'try', 'while', 'with', 'yield'),
+    literals=('True', 'False', 'None', 'self'))
+
+_JAVASCRIPT = Language(
+    [(COMMENT, _C_COMMENTS),
+     (STRING, r'`(?:[^`\\]|\\[\s\S])*(?:`|\Z)|' + _strings('"', "'")),
+     (NUMBER, _NUMBER),
+     (None, r'[A-Za-z_$][\w$]*')],
+    keywords=('async', 'await', 'break', 'case', 'catch', 'class', 'const', 'continue', 'default', 'delete', 'do',
+              'else', 'export', 'extends', 'finally', 'for', 'from', 'function', 'if', 'import', 'in', 'instanceof',
+              'interface', 'let', 'new', 'of', 'return', 'static', 'switch', 'throw', 'try', 'type', 'typeof', 'var',
+              'void', 'while', 'yield'),
+    literals=('true', 'false', 'null', 'undefined', 'this', 'super'))
+
+_SHELL = Language(
+    [(COMMENT, r'(?<![\w$])#[^\n]*'),
+     (STRING, _strings('"') + r"|'[^']*'?"),
+     (NUMBER, r'\b\d+\b'),
+     (None, r'[A-Za-z_][\w-]*')],
+    keywords=('if', 'then', 'else', 'elif', 'fi', 'for', 'in', 'do', 'done', 'while', 'until', 'case', 'esac',
+              'function', 'return', 'export', 'local', 'readonly', 'trap', 'exit'),
+    literals=('true', 'false'))
+
+_JSON = Language(
+    [(STRING, _strings('"')),
+     (NUMBER, r'-?' + _NUMBER),
+     (None, r'[A-Za-z]+')],
+    literals=('true', 'false', 'null'))
+
+_CSS = Language(
+    [(COMMENT, r'/\*[\s\S]*?(?:\*/|\Z)'),
+     (STRING, _strings('"', "'")),
+     (NUMBER, r'#[0-9a-fA-F]{3,8}\b|(?<![\w-])-?(?:\d+\.?\d*|\.\d+)(?:%|[a-zA-Z]+)?'),
+     (KEYWORD, r'@[\w-]+|!important')])
+
+_HTML = Language(
+    [(COMMENT, r'<!--[\s\S]*?(?:-->|\Z)'),
+     (TAG, r'</?[A-Za-z][\w:-]*|/?>'),
+     (STRING, _strings('"', "'"))])
+
+LANGUAGES = {
+    'python': _PYTHON, 'py': _PYTHON,
+    'javascript': _JAVASCRIPT, 'js': _JAVASCRIPT, 'typescript': _JAVASCRIPT, 'ts': _JAVASCRIPT,
+    'bash': _SHELL, 'sh': _SHELL, 'shell': _SHELL, 'zsh': _SHELL,
+    'json': _JSON,
+    'css': _CSS,
+    'html': _HTML, 'xml': _HTML, 'svg': _HTML,
+}
+
+class HighlightCache(LRUCache):
+    # Bounded LRU of highlighted html keyed by (language, hash of the code), so a snippet that appears on many
+    # pages is tokenized once per build.
+    def __init__(self, max_entries=1024):
+        super().__init__('highlight_cache', max_entries)
+
+def highlight(code, language):
+    # escaped html of code, with its tokens wrapped in <span class="tok-..."> for known languages
+    lexer = LANGUAGES.get(language)
+    if lexer is None:
+        return escape(code, quote=False)
+    key = (language, hashlib.sha256(code.encode()).digest())
+    return highlight_cache.get(key, _highlight, lexer, code)
+
+def _highlight(lexer, code):
+    with instrumentation.phase('highlight'):
+        return ''.join(escape(text, quote=False) if token_class is None
+                       else f'<span class="tok-{token_class}">{escape(text, quote=False)}</span>'
+                       for token_class, text in lexer.tokenize(code))
+
+highlight_cache = HighlightCache()
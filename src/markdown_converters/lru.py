@@ -0,0 +1,78 @@
+import threading
+from collections import OrderedDict
+
+import instrumentation
+
+
+class CacheStats:
+    __slots__ = ('name', 'hits', 'misses', 'evictions')
+
+    def __init__(self, name):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __str__(self):
+        return (f'{self.name.replace("_", " ")}: {self.hits} hits, {self.misses} misses '
+                f'({self.hit_rate():.0%} hit rate), {self.evictions} evictions')
+
+class LRUCache:
+    # Bounded, thread-safe map of built values that drops the least recently used entry beyond max_entries;
+    # with max_entries of 0 or less values are built and not kept. Hits and misses are also counted as
+    # '<name>_hits' and '<name>_misses' in the active profile. Subclasses can track entries through
+    # _added and _evicted, which are called with the lock held.
+    def __init__(self, name, max_entries):
+        self.max_entries = max_entries
+        self.stats = CacheStats(name)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, build, *args):
+        # the value cached for key, or build(*args); if another thread stored key first, its value wins
+        if self.max_entries <= 0:
+            return build(*args)
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+        if value is not None:
+            instrumentation.count(self.stats.name + '_hits')
+            return value
+        value = build(*args)
+        instrumentation.count(self.stats.name + '_misses')
+        with self._lock:
+            self.stats.misses += 1
+            existing = self._entries.get(key)
+            if existing is not None:
+                return existing
+            self._entries[key] = value
+            self._added(value)
+            while len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                self.stats.evictions += 1
+                self._evicted(evicted)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.stats = CacheStats(self.stats.name)
+            self._cleared()
+
+    def _added(self, value):
+        pass
+
+    def _evicted(self, value):
+        pass
+
+    def _cleared(self):
+        pass
@@ -1,10 +1,14 @@
 import re
+from html import escape
 from enum import Enum
-from functools import reduce
+from types import MappingProxyType
 
-from htmlnode import ParentNode
+import instrumentation
+from htmlnode import LeafNode, ParentNode
+from markdown_converters.block_memo import block_memo
+from markdown_converters.highlight import highlight
 from markdown_converters.markdown_to_text_node import textnodes_from_markdown
-from textnode import TextNode
+from textnode import TextNode, TextType
 
 
 class BlockType(Enum):
@@ -15,88 +19,159 @@ class BlockType(Enum):
     UNORDERED_LIST = 'unordered_list'
     ORDERED_LIST = 'ordered_list'
 
-def markdown_to_blocks(markdown_text):
-    return list(
-        filter(
-            lambda block: block != '',
-            map(
-                lambda block: re.sub(r'^\s+|\s+$', '', block),
-                markdown_text.split('\n\n')
-            )
-        )
-    )
-
-_block_type_identifiers = {
-    # (regex, line by line)
-    BlockType.HEADING: ('^#{1,6} ', False),
-    BlockType.CODE: ('^```.*\r\n(?P<content>(?:.|\n|\r)*)```$', False),
-    BlockType.QUOTE: ('^> ', True),
-    BlockType.UNORDERED_LIST: ('^[*-] ', True),
-    BlockType.ORDERED_LIST: ('^[0-9]+\\. ', True),
-    BlockType.PARAGRAPH: ('.*', False)
-}
-
-def block_to_block_type(block):
-    for block_type, identifier in _block_type_identifiers.items():
-        if identifier[1]:
-            if len(block) == 0:
-                continue
-            # Line by Line evaluation
-            if reduce(lambda a,b: a and b, map(lambda line: re.match(identifier[0], line), block.splitlines())):
-                return block_type
-        else:
-            # Whole block at once
-            if re.match(identifier[0], block):
-                return block_type
-    return None
+_ORDERED_LIST_PREFIX = re.compile(r'[0-9]+\. ')
+_LINE_BASED_BLOCK_TYPES = frozenset((BlockType.QUOTE, BlockType.UNORDERED_LIST, BlockType.ORDERED_LIST))
 
-def block_to_text_block(block):
-    block_type = block_to_block_type(block)
-    identifier = _block_type_identifiers[block_type]
+def markdown_to_blocks(markdown_text):
+    return list(map('\n'.join, _block_lines(markdown_text.splitlines())))
+
+def _block_lines(lines):
+    # Groups lines into blocks in a single pass. Blank and whitespace-only lines end a block unless they are
+    # inside a fenced code block. A fence opens on any line starting with ```, also right after other lines,
+    # and closes only on a line that is nothing but the fence; a fence left open is closed at the end.
+    block = []
+    fenced = False
+    for line in lines:
+        if fenced:
+            block.append(line)
+            if _is_fence(line):
+                fenced = False
+                yield _trim_block(block)
+                block = []
+            continue
+        if line == '' or line.isspace():
+            if block:
+                yield _trim_block(block)
+                block = []
+            continue
+        stripped = line.lstrip()
+        if _opens_fence(stripped):
+            if block:
+                yield _trim_block(block)
+                block = []
+            fenced = True
+        if not block:
+            line = stripped
+        block.append(line)
+    if fenced:
+        block.append('```')
+    if block:
+        yield _trim_block(block)
+
+def _trim_block(block):
+    block[-1] = block[-1].rstrip()
+    return block
+
+def _is_single_line_code(line):
+    return len(line) >= 6 and line.startswith('```') and line.endswith('```')
+
+def _opens_fence(line):
+    # ``` and an optional language, which like in CommonMark cannot contain backticks
+    return line.startswith('```') and '`' not in line.lstrip('`')
+
+def _is_fence(line):
+    line = line.strip()
+    return len(line) >= 3 and line.strip('`') == ''
+
+def _heading_level(line):
+    level = 0
+    while level < len(line) and line[level] == '#':
+        level += 1
+    if 1 <= level <= 6 and line[level:level + 1] == ' ':
+        return level
+    return 0
+
+def _line_prefix(line):
+    # (block type, prefix length) of a quote or list line, chosen by its first character
+    first = line[:1]
+    if first == '>':
+        if line[1:2] == ' ':
+            return BlockType.QUOTE, 2
+    elif first == '*' or first == '-':
+        if line[1:2] == ' ':
+            return BlockType.UNORDERED_LIST, 2
+    elif first.isdigit():
+        match = _ORDERED_LIST_PREFIX.match(line)
+        if match:
+            return BlockType.ORDERED_LIST, match.end()
+    return None, 0
+
+def _lines_block_type(lines):
+    if len(lines) == 0:
+        return BlockType.PARAGRAPH
+    first = lines[0]
+    if first[:1] == '#' and _heading_level(first):
+        return BlockType.HEADING
+    if first[:3] == '```' and (_is_single_line_code(first) if len(lines) == 1 else _is_fence(lines[-1])):
+        return BlockType.CODE
+    block_type = _line_prefix(first)[0]
+    if block_type is None:
+        return BlockType.PARAGRAPH
+    for line in lines:
+        if _line_prefix(line)[0] != block_type:
+            return BlockType.PARAGRAPH
+    return block_type
+
+def _lines_to_text_block(lines):
+    return block_memo.text_block('\n'.join(lines), _timed_build_text_block, lines)
+
+def _timed_build_text_block(lines):
+    with instrumentation.phase('blocks'):
+        return _build_text_block(lines)
+
+def _build_text_block(lines):
+    block_type = _lines_block_type(lines)
     children = []
     additional_info = None
-    if len(block) > 0:
-        if identifier[1]:
-            # line by line
-            for line in block.splitlines():
-                match = re.match(identifier[0], line)
-                line_without_prefix = line[match.end():]
-                children.append(textnodes_from_markdown(line_without_prefix))
+    if len(lines) > 0:
+        if block_type in _LINE_BASED_BLOCK_TYPES:
+            for line in lines:
+                children.append(textnodes_from_markdown(line[_line_prefix(line)[1]:]))
         elif block_type == BlockType.PARAGRAPH:
-            children = textnodes_from_markdown(block)
+            children = textnodes_from_markdown('\n'.join(lines))
         elif block_type == BlockType.HEADING:
-            match = re.match(identifier[0], block)
-            block_without_prefix = block[match.end():]
-            children = textnodes_from_markdown(block_without_prefix)
-            additional_info = match.end() - 1
+            additional_info = _heading_level(lines[0])
+            children = textnodes_from_markdown('\n'.join([lines[0][additional_info + 1:]] + lines[1:]))
         elif block_type == BlockType.CODE:
-            match = re.match(identifier[0], block)
-            code_content = match.group('content')
-            children = textnodes_from_markdown(code_content)
+            # code is kept as one raw text node, with the language from the opening fence as additional info
+            if len(lines) == 1:
+                code_content = lines[0][3:-3]
+            else:
+                additional_info = _fence_language(lines[0])
+                code_content = '\n'.join(lines[1:-1] + [''])
+            children = [TextNode(code_content, TextType.NORMAL)]
         else:
             raise Exception(f'Unsupported block type: {block_type}')
 
     return TextBlock(block_type, children, additional_info)
 
+def _fence_language(line):
+    words = line[3:].split(None, 1)
+    return words[0].lower() if words else None
+
+def block_to_block_type(block):
+    return _lines_block_type(block.splitlines())
+
+def block_to_text_block(block):
+    return _lines_to_text_block(block.splitlines())
+
+def text_blocks_from_lines(lines, memoize=True):
+    return map(_lines_to_text_block if memoize else _timed_build_text_block, _block_lines(lines))
+
 def markdown_to_text_blocks(markdown_text):
-    return list(map(block_to_text_block, markdown_to_blocks(markdown_text)))
+    return list(text_blocks_from_lines(markdown_text.splitlines()))
 
 def markdown_to_html_nodes(markdown_text):
-    return ParentNode(tag='div', children=list(map(lambda block: block.to_html_node(), markdown_to_text_blocks(markdown_text))))
+    return ParentNode(tag='div', children=list(map(block_memo.html_node, markdown_to_text_blocks(markdown_text))))
 
-def extract_title(markdown_text):
-    return list(filter(
-        lambda tb: tb.block_type == BlockType.HEADING and tb.additional_info == 1,
-        markdown_to_text_blocks(markdown_text)))[0].children[0].text
-
-_block_type_to_html_tag = {
+_block_type_to_html_tag = MappingProxyType({
     BlockType.PARAGRAPH: 'p',
     BlockType.HEADING: 'h',
     BlockType.CODE: 'code',
-    BlockType.QUOTE: ['blockquote', ''],
-    BlockType.UNORDERED_LIST: ['ul', 'li'],
-    BlockType.ORDERED_LIST: ['ol', 'li'],
-}
+    BlockType.QUOTE: ('blockquote', ''),
+    BlockType.UNORDERED_LIST: ('ul', 'li'),
+    BlockType.ORDERED_LIST: ('ol', 'li'),
+})
 
 def _children_as_html(children, tags):
     tag = None
@@ -116,6 +191,8 @@ def _children_as_html(children, tags):
     return as_html
 
 class TextBlock:
+    __slots__ = ('block_type', 'children', 'additional_info')
+
     def __init__(self, block_type, children, additional_info=None):
         self.block_type = block_type
         self.children = children
@@ -130,6 +207,8 @@ class TextBlock:
     def to_html_node(self):
         if self.block_type not in _block_type_to_html_tag:
             raise Exception(f'Unknown block type: {self.block_type}')
+        if self.block_type == BlockType.CODE:
+            return self._code_html_node()
 
         children_as_html = []
         tag = _block_type_to_html_tag[self.block_type]
@@ -138,7 +217,7 @@ class TextBlock:
         if self.block_type == BlockType.QUOTE:
             children = [x for xs in children for x in xs]
 
-        if _block_type_identifiers[self.block_type][1]:
+        if self.block_type in _LINE_BASED_BLOCK_TYPES:
             children_as_html = _children_as_html(children, tag[1:])
             tag = tag[0]
         else:
@@ -147,4 +226,10 @@ class TextBlock:
         if self.block_type == BlockType.HEADING:
             tag += str(self.additional_info)
 
-        return ParentNode(tag, children_as_html)
\ No newline at end of file
+        return ParentNode(tag, children_as_html)
+
+    def _code_html_node(self):
+        language = self.additional_info
+        props = None if language is None else {'class': 'language-' + escape(language)}
+        code = ''.join(map(lambda child: child.text, self.children))
+        return ParentNode('pre', [LeafNode('code', highlight(code, language), props)])
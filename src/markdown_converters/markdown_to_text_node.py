@@ -1,93 +1,133 @@
-from textnode import TextType, TextNode
 import re
-from functools import reduce
+
+import instrumentation
+from textnode import TextType, TextNode
+
+_SPECIAL_CHARACTERS = re.compile(r'[`*_!\[]')
 
 
 def extract_markdown_images(text):
-    return _extract_markdown_with_url(text, TextType.IMAGES)
+    return extract_markdown_references(text)[0]
 
 def extract_markdown_links(text):
-    return _extract_markdown_with_url(text, TextType.LINKS)
+    return extract_markdown_references(text)[1]
 
-def _extract_markdown_with_url(text, text_type):
-    return list(
-        map(
-            lambda node: (node.text, node.url),
-            filter(
-                lambda node: node.text_type == text_type,
-                textnodes_from_markdown(text)
-            )
-        )
-    )
+def extract_markdown_references(text):
+    # images and links from a single tokenization of the text
+    return references_from_text_nodes(textnodes_from_markdown(text))
 
-def textnodes_from_markdown(text):
-    text_type_to_delimiters = {
-        TextType.CODE: '`',
-        TextType.BOLD: '\\*\\*',
-        TextType.ITALIC: '\\_',
-        TextType.IMAGES: '![',
-        TextType.LINKS: '[',
-    }
-    node = TextNode(text, TextType.NORMAL)
-    nodes = [node]
-    for text_type, delimiter in text_type_to_delimiters.items():
-        nodes = split_nodes_delimiter(nodes, delimiter, text_type)
-
-    return nodes
+def references_from_text_nodes(nodes):
+    images = []
+    links = []
+    for node in nodes:
+        if node.text_type == TextType.IMAGES:
+            images.append((node.text, node.url))
+        elif node.text_type == TextType.LINKS:
+            links.append((node.text, node.url))
+    return images, links
 
-def split_nodes_delimiter(old_nodes, delimiter, text_type):
-    def regex_extractor():
-        def extractor(node):
-            split_text = re.split(delimiter, node.text)
-            if len(split_text) <= 1:
-                return [node]
-            nodes = []
-            for i in range(0, len(split_text)):
-                if split_text[i] == '':
-                    continue
-                if i % 2 == 0:
-                    nodes.append(TextNode(split_text[i], TextType.NORMAL))
-                else:
-                    nodes.append(TextNode(split_text[i], text_type))
-            return nodes
-        return extractor
+def textnodes_from_markdown(text):
+    with instrumentation.phase('inline'):
+        return _InlineScanner(text).scan()
 
-    def url_based_extractor(node, pattern, inner_text_type, func):
-        match = re.search(pattern, node.text)
-        if match:
-            text = match.group('text')
-            url = match.group('url')
+class _InlineScanner:
+    # Single left-to-right pass. Every delimiter lookup goes through _find, which remembers the next
+    # occurrence of each token, so unmatched delimiters cannot make the scan quadratic.
+    def __init__(self, text):
+        self.text = text
+        self.next_occurrence = {}
 
-            pre_text = node.text[:match.start()]
-            pre_text_nodes = []
-            if pre_text != '':
-                pre_text_nodes.append(TextNode(pre_text, TextType.NORMAL))
-            link_node = TextNode(text, inner_text_type, url)
-            post_text = node.text[match.end():]
-            post_text_nodes = []
-            if post_text != '':
-                post_text_nodes = func(TextNode(post_text, TextType.NORMAL))
-            return pre_text_nodes + [link_node] + post_text_nodes
-        else:
-            return [node]
+    def scan(self):
+        text = self.text
+        nodes = []
+        position = 0
+        text_start = 0
+        while True:
+            match = _SPECIAL_CHARACTERS.search(text, position)
+            if match is None:
+                break
+            start = match.start()
+            span = self._span_at(start)
+            if span is None:
+                position = start + (2 if text.startswith('**', start) else 1)
+                continue
+            span_text, text_type, url, end = span
+            if text_start < start:
+                nodes.append(TextNode(text[text_start:start], TextType.NORMAL))
+            if span_text != '' or url is not None:
+                nodes.append(TextNode(span_text, text_type, url))
+            position = text_start = end
+        if text_start < len(text):
+            nodes.append(TextNode(text[text_start:], TextType.NORMAL))
+        return nodes
 
-    def link_extractor(node):
-        return url_based_extractor(node, r"\[(?P<text>.*?)]\((?P<url>[^) ]*)\)", TextType.LINKS, link_extractor)
+    def _span_at(self, start):
+        text = self.text
+        character = text[start]
+        if character == '`':
+            return self._delimited(start, '`', TextType.CODE)
+        if character == '*':
+            if text.startswith('**', start):
+                return self._delimited(start, '**', TextType.BOLD)
+            # '* ' is a bullet or a lone asterisk, and single '*' emphasis stays within its line
+            if start + 1 < len(text) and not text[start + 1].isspace():
+                return self._delimited(start, '*', TextType.ITALIC, single_line=True)
+            return None
+        if character == '_':
+            return self._delimited(start, '_', TextType.ITALIC)
+        if character == '!':
+            if text.startswith('![', start):
+                return self._with_url(start + 1, TextType.IMAGES)
+            return None
+        return self._with_url(start, TextType.LINKS)
 
-    def image_extractor(node):
-        return url_based_extractor(node, r"!\[(?P<text>.*?)]\((?P<url>[^) ]*)(?: \"(?P<title>.*)\")?\)", TextType.IMAGES, image_extractor)
+    def _delimited(self, start, delimiter, text_type, single_line=False):
+        content_start = start + len(delimiter)
+        end = self._find(delimiter, content_start)
+        if end == -1:
+            return None
+        if single_line:
+            newline = self._find('\n', content_start)
+            if newline != -1 and newline < end:
+                return None
+        return self.text[content_start:end], text_type, None, end + len(delimiter)
 
-    extractor = {
-        TextType.BOLD: regex_extractor(),
-        TextType.ITALIC: regex_extractor(),
-        TextType.CODE: regex_extractor(),
-        TextType.LINKS: link_extractor,
-        TextType.IMAGES: image_extractor,
-    }
+    def _with_url(self, bracket, text_type):
+        middle = self._find('](', bracket + 1)
+        if middle == -1:
+            return None
+        newline = self._find('\n', bracket + 1)
+        if newline != -1 and newline < middle:
+            return None
+        target = self._target(middle + 2, text_type == TextType.IMAGES)
+        if target is None:
+            return None
+        return (self.text[bracket + 1:middle], text_type) + target
 
-    def split(node):
-        if node.text_type != TextType.NORMAL:
-            return [node]
-        return extractor[text_type](node)
+    def _target(self, url_start, allow_title):
+        # (url, end) of 'url)', or for images also 'url "title")'. Found with _find rather than a regex match,
+        # which would rescan the rest of the text for every '](' without a closing parenthesis.
+        text = self.text
+        url_end = min(filter(lambda found: found != -1, (self._find(')', url_start), self._find(' ', url_start))),
+                      default=-1)
+        if url_end == -1:
+            return None
+        end = url_end
+        if text[url_end] == ' ':
+            if not allow_title or not text.startswith(' "', url_end):
+                return None
+            title_end = self._find('"', url_end + 2)
+            if title_end == -1 or not text.startswith(')', title_end + 1):
+                return None
+            end = title_end + 1
+        return text[url_start:url_end], end + 1
 
-    return reduce(lambda x,y: x+y, map(split, old_nodes), [])
+    def _find(self, token, start):
+        cached = self.next_occurrence.get(token)
+        if cached is not None:
+            searched_from, found = cached
+            if searched_from <= start and (found == -1 or found >= start):
+                return found
+        found = self.text.find(token, start)
+        self.next_occurrence[token] = (start, found)
+        return found
@@ -0,0 +1,64 @@
+import unittest
+from unittest import mock
+
+from markdown_converters import markdown_to_blocks
+from markdown_converters.block_memo import BlockMemo, block_memo
+from markdown_converters.document import Document
+from markdown_converters.markdown_to_blocks import block_to_text_block
+
+SHARED = '> This post is **not** financial advice.\n> See [the rules](/rules).'
+
+
+class TestBlockMemo(unittest.TestCase):
+    def setUp(self):
+        self.memo = BlockMemo(max_entries=2)
+
+    def test_identical_text_shares_block(self):
+        first = self.memo.text_block('text', lambda: object())
+        second = self.memo.text_block('text', lambda: object())
+        self.assertIs(first, second)
+        self.assertEqual((self.memo.stats.hits, self.memo.stats.misses), (1, 1))
+        self.assertEqual(self.memo.stats.hit_rate(), 0.5)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        a = self.memo.text_block('a', lambda: object())
+        self.memo.text_block('b', lambda: object())
+        self.memo.text_block('a', lambda: object())
+        self.memo.text_block('c', lambda: object())
+        self.assertEqual(len(self.memo), 2)
+        self.assertEqual(self.memo.stats.evictions, 1)
+        self.assertIs(self.memo.text_block('a', lambda: object()), a)
+        self.assertEqual(self.memo.stats.misses, 3)
+
+    def test_fragment_is_rendered_once_per_basepath(self):
+        block = self.memo.text_block(SHARED, block_to_text_block, SHARED)
+        expected = block.to_html_node().to_html('/blog/')
+        with mock.patch.object(type(block), 'to_html_node', wraps=block.to_html_node) as to_html_node:
+            self.assertEqual(self.memo.to_html(block, '/blog/'), expected)
+            self.assertEqual(self.memo.to_html(block, '/blog/'), expected)
+            self.assertEqual(self.memo.to_html(block, '/'), block.to_html_node().to_html('/'))
+        self.assertEqual(to_html_node.call_count, 2)
+
+    def test_blocks_not_in_memo_are_rendered_directly(self):
+        block = block_to_text_block(SHARED)
+        self.assertEqual(self.memo.to_html(block), block.to_html_node().to_html())
+        self.assertEqual(len(self.memo), 0)
+
+    def test_long_blocks_are_not_memoized(self):
+        memo = BlockMemo(max_block_length=3)
+        memo.text_block('long', lambda: object())
+        self.assertEqual(len(memo), 0)
+        self.assertEqual(memo.stats.misses, 0)
+
+    def test_pages_share_parsed_blocks(self):
+        block_memo.clear()
+        first = Document(f'# First\n\n{SHARED}')
+        second = Document(f'# Second\n\n{SHARED}')
+        with mock.patch.object(markdown_to_blocks, '_build_text_block', wraps=markdown_to_blocks._build_text_block) as build:
+            self.assertIs(first.blocks[1], second.blocks[1])
+        self.assertEqual(build.call_count, 3)
+        self.assertEqual(''.join(second.iter_html('/blog/')), second.html_node.to_html('/blog/'))
+
+
+if __name__ == '__main__':
+    unittest.main()
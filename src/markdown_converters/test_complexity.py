@@ -0,0 +1,84 @@
+import json
+import os
+import subprocess
+import sys
+import time
+import unittest
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Adversarial markdown for markdown_to_html_nodes, as a function of a repeat count. Each case is timed at
+# SMALL and SMALL * SCALE repeats: linear code takes about SCALE times longer, quadratic code SCALE ** 2 times.
+CASES = {
+    'unmatched_bold': lambda n: 'a ** b ' * n,
+    'unmatched_italic': lambda n: 'a _b ' * n,
+    'unmatched_star': lambda n: 'a *b ' * n,
+    'unmatched_backticks': lambda n: 'a `b ' * n,
+    'open_brackets': lambda n: '[' * (n * 4),
+    'open_images': lambda n: '![a' * n,
+    'link_without_target': lambda n: '[a](' * n,
+    'bracket_then_newline': lambda n: '[a\n' * n,
+    'alternating_delimiters': lambda n: '*_`' * n,
+    'links': lambda n: '[a](/b) ' * n,
+    'unclosed_fence': lambda n: '```python\n' + 'x = "**_`[\n' * n,
+    'long_code_block': lambda n: '```\n' + 'a ** b _ c ` d [e](\n' * n + '```',
+    'unterminated_strings': lambda n: '```python\n' + '"""' + '\'a "b\n' * n + '```',
+    'long_list': lambda n: '* item **a**\n' * n,
+    'long_quote': lambda n: '> quote _a_\n' * n,
+    'many_blocks': lambda n: 'para\n\n' * n,
+    'nested_quotes': lambda n: '>' * (n * 4) + ' deep',
+    'heading_markers': lambda n: '#' * (n * 4) + ' heading',
+    'ordered_prefixes': lambda n: '1' * (n * 4) + '. item',
+}
+SMALL = 500
+SCALE = 8
+# allowed factor over linear growth, for timer noise and cache effects
+SLACK = 3
+# absolute allowance in seconds, so sub-millisecond timings do not fail on noise alone
+NOISE = 0.002
+# hard limit for timing one case at both sizes, in a subprocess so catastrophic backtracking inside the regex
+# engine or a crash can be stopped
+WALL_CLOCK_CAP = 10
+
+def measure(name, repeats=3):
+    # prints the best time at each size as JSON; run in a subprocess by the tests
+    from markdown_converters.block_memo import block_memo
+    from markdown_converters.highlight import highlight_cache
+    from markdown_converters.markdown_to_blocks import markdown_to_html_nodes
+    block_memo.max_entries = 0
+    highlight_cache.max_entries = 0
+    timings = []
+    for count in (SMALL, SMALL * SCALE):
+        markdown = CASES[name](count)
+        best = None
+        for _ in range(repeats):
+            start = time.perf_counter()
+            markdown_to_html_nodes(markdown).to_html()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        timings.append(best)
+    print(json.dumps(timings))
+
+
+class TestComplexity(unittest.TestCase):
+    def _timings(self, name):
+        code = f'from markdown_converters.test_complexity import measure; measure({name!r})'
+        try:
+            result = subprocess.run([sys.executable, '-c', code], env=dict(os.environ, PYTHONPATH=SRC_DIR),
+                                    capture_output=True, text=True, timeout=WALL_CLOCK_CAP)
+        except subprocess.TimeoutExpired:
+            self.fail(f'{name} did not finish within {WALL_CLOCK_CAP}s')
+        self.assertEqual(result.returncode, 0, f'{name} crashed:\n{result.stderr}')
+        return json.loads(result.stdout)
+
+    def test_linear_growth(self):
+        for name in CASES:
+            with self.subTest(name):
+                small, large = self._timings(name)
+                self.assertLessEqual(large, small * SCALE * SLACK + NOISE,
+                                     f'{name}: {small * 1000:.2f}ms at {SMALL}, {large * 1000:.2f}ms at '
+                                     f'{SMALL * SCALE} repeats')
+
+
+if __name__ == '__main__':
+    unittest.main()
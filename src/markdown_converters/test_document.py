@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+
+from markdown_converters.document import Document, StreamingDocument, extract_title
+from markdown_converters.markdown_to_blocks import markdown_to_html_nodes
+
+MARKDOWN = """# Tolkien **Fan** Club
+
+Read my [first post](/majesty) and see ![a map](/images/map.png).
+
+## Reasons
+
+* It has [a wiki](https://example.com)
+* It has ![elves](/images/elves.png)
+
+### Details
+"""
+
+
+class TestDocument(unittest.TestCase):
+    def test_title(self):
+        self.assertEqual(Document(MARKDOWN).title, 'Tolkien Fan Club')
+
+    def test_title_after_blocks_are_parsed(self):
+        document = Document(MARKDOWN)
+        self.assertEqual(len(document.blocks), 5)
+        self.assertEqual(document.title, 'Tolkien Fan Club')
+
+    def test_title_does_not_parse_whole_document(self):
+        document = Document('# Title\n\nanything')
+        self.assertEqual(document.title, 'Title')
+        self.assertNotIn('blocks', document.__dict__)
+
+    def test_missing_title(self):
+        with self.assertRaises(Exception):
+            extract_title('## only a second level heading')
+
+    def test_extract_title(self):
+        self.assertEqual(extract_title('text\n\n#  spaced title '), ' spaced title')
+
+    def test_headings(self):
+        self.assertEqual(Document(MARKDOWN).headings, [(1, 'Tolkien Fan Club'), (2, 'Reasons'), (3, 'Details')])
+
+    def test_links(self):
+        self.assertEqual(Document(MARKDOWN).links, [('first post', '/majesty'), ('a wiki', 'https://example.com')])
+
+    def test_images(self):
+        self.assertEqual(Document(MARKDOWN).images, [('a map', '/images/map.png'), ('elves', '/images/elves.png')])
+
+    def test_html_node(self):
+        document = Document(MARKDOWN)
+        self.assertEqual(document.html_node, markdown_to_html_nodes(MARKDOWN))
+        self.assertIs(document.html_node, document.html_node)
+
+    def test_streaming_document(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, 'index.md')
+            with open(path, 'w') as file:
+                file.write(MARKDOWN)
+            document = StreamingDocument(path)
+            self.assertEqual(document.title, 'Tolkien Fan Club')
+            self.assertEqual(''.join(document.iter_html('/base/')), Document(MARKDOWN).html_node.to_html('/base/'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+from markdown_converters.highlight import HighlightCache, LANGUAGES, highlight, highlight_cache
+
+
+class TestHighlight(unittest.TestCase):
+    def setUp(self):
+        highlight_cache.clear()
+
+    def test_python(self):
+        self.assertEqual(
+            highlight('def f(x):  # "note"\n    return x or None', 'python'),
+            '<span class="tok-kw">def</span> f(x):  <span class="tok-com"># "note"</span>\n'
+            '    <span class="tok-kw">return</span> x <span class="tok-kw">or</span> <span class="tok-lit">None</span>')
+
+    def test_escapes_code(self):
+        self.assertEqual(highlight('a = "<b>" & 1', 'js'),
+                         'a = <span class="tok-str">"&lt;b&gt;"</span> &amp; <span class="tok-num">1</span>')
+        self.assertEqual(highlight('<b>**not bold**</b>', None), '&lt;b&gt;**not bold**&lt;/b&gt;')
+
+    def test_unterminated_tokens_run_to_the_end(self):
+        self.assertEqual(highlight('x = "open\ny', 'python'),
+                         'x = <span class="tok-str">"open</span>\ny')
+        self.assertEqual(highlight('a /* b', 'css'), 'a <span class="tok-com">/* b</span>')
+
+    def test_spans_cover_the_code(self):
+        code = 'for i in 1 2; do echo "$i" \'#x\' # done\ndone'
+        for language in LANGUAGES.values():
+            self.assertEqual(''.join(map(lambda span: span[1], language.tokenize(code))), code)
+
+    def test_identical_snippets_are_tokenized_once(self):
+        first = highlight('print(1)', 'python')
+        second = highlight('print(1)', 'py')
+        self.assertEqual(first, second)
+        highlight('print(1)', 'python')
+        self.assertEqual((highlight_cache.stats.hits, highlight_cache.stats.misses), (1, 2))
+
+    def test_cache_is_bounded(self):
+        cache = HighlightCache(max_entries=2)
+        for key in 'abc':
+            cache.get(key, str, key)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get('c', lambda: self.fail('c was evicted')), 'c')
+        self.assertEqual(cache.get('a', lambda: 'rebuilt'), 'rebuilt')
+        self.assertEqual((cache.stats.hits, cache.stats.misses), (1, 4))
+
+
+if __name__ == '__main__':
+    unittest.main()
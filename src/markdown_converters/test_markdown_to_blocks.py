@@ -39,6 +39,32 @@ This is a paragraph of text. It has some **bold** and *italic* words inside of i
 
             self.assertEqual(markdown_to_blocks(text), expected)
 
+    def test_markdown_to_blocks_fenced_code(self):
+        test_cases = [
+            # blank lines inside a fence do not split it
+            ('```py\na = 1\n\n\nb = 2\n```\n\nafter', ['```py\na = 1\n\n\nb = 2\n```', 'after']),
+            ('a\r\n\r\n```\r\nx\r\n\r\ny\r\n```\r\nb', ['a', '```\nx\n\ny\n```', 'b']),
+            # a fence opens directly after a paragraph line
+            ('text\n```\ncode\n\nmore\n```', ['text', '```\ncode\n\nmore\n```']),
+            # only a line that is nothing but the fence closes it
+            ('```py\ns = "```"\n\nt = 1\n  ```  \nafter', ['```py\ns = "```"\n\nt = 1\n  ```', 'after']),
+            # an unclosed fence is closed at the end of the text
+            ('para\n\n```\ncode\n\n# not a heading', ['para', '```\ncode\n\n# not a heading\n```']),
+            # whitespace-only lines separate blocks outside fences
+            ('a\n  \t\nb', ['a', 'b']),
+            ('inline ```code``` stays\n```x``` too', ['inline ```code``` stays\n```x``` too']),
+        ]
+
+        for test_case in test_cases:
+            text = test_case[0]
+            expected = test_case[1]
+
+            self.assertEqual(markdown_to_blocks(text), expected)
+
+        self.assertEqual(block_to_text_block(markdown_to_blocks('```\ncode\n\n# not a heading')[0]),
+                         TextBlock(BlockType.CODE, [TextNode('code\n\n# not a heading\n', TextType.NORMAL)]))
+        self.assertEqual(block_to_block_type('```py\ns = "```"'), BlockType.PARAGRAPH)
+
     def test_block_to_block_type(self):
         test_cases = [
             ('', BlockType.PARAGRAPH),
@@ -137,6 +163,10 @@ This is a paragraph of text. It has some **bold** and *italic* words inside of i
                  [TextNode('order', TextType.NORMAL)],
                  [TextNode('list', TextType.NORMAL)],
              ])),
+            ('```single **line** code```',
+             TextBlock(BlockType.CODE, [TextNode('single **line** code', TextType.NORMAL)])),
+            ('```Python\ndef _f(): return `x` ** 2\n```',
+             TextBlock(BlockType.CODE, [TextNode('def _f(): return `x` ** 2\n', TextType.NORMAL)], 'python')),
         ]
 
         for test_case in test_cases:
@@ -186,6 +216,12 @@ This is a paragraph of text. It has some **bold** and *italic* words inside of i
                     LeafNode(tag='', value='item 2')
                 ])
             ])),
+            (TextBlock(BlockType.CODE, [
+                TextNode('a <b> & **c**', TextType.NORMAL)
+            ]), ParentNode('pre', [LeafNode('code', 'a &lt;b&gt; &amp; **c**')])),
+            (TextBlock(BlockType.CODE, [
+                TextNode('<x>', TextType.NORMAL)
+            ], 'unknown"lang'), ParentNode('pre', [LeafNode('code', '&lt;x&gt;', {'class': 'language-unknown&quot;lang'})])),
         ]
 
         for test_case in test_cases:
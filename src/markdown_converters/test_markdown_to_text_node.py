@@ -1,7 +1,7 @@
 import unittest
 
 from markdown_converters.markdown_to_text_node import textnodes_from_markdown, extract_markdown_images, \
-    extract_markdown_links
+    extract_markdown_links, extract_markdown_references
 from textnode import TextNode, TextType
 
 
@@ -113,5 +113,25 @@ class TestMarkdownToTextNode(unittest.TestCase):
             for expected, actual in zip(expected, res):
                 self.assertEqual(expected, actual)
 
+    def test_extract_markdown_references(self):
+        text = '![map](/map.png) see [home](/) and ![elf](/elf.png "Elf") or [wiki](https://example.com)'
+        self.assertEqual(extract_markdown_references(text), (
+            [('map', '/map.png'), ('elf', '/elf.png')],
+            [('home', '/'), ('wiki', 'https://example.com')]
+        ))
+        self.assertEqual(extract_markdown_references('empty'), ([], []))
+
+    def test_single_star_italic_stays_on_its_line(self):
+        self.assertEqual(textnodes_from_markdown('a *b\nc* d'), [TextNode('a *b\nc* d', TextType.NORMAL)])
+        self.assertEqual(textnodes_from_markdown('see *this\n* bullet *here*'), [
+            TextNode('see *this\n* bullet ', TextType.NORMAL),
+            TextNode('here', TextType.ITALIC),
+        ])
+        self.assertEqual(textnodes_from_markdown('* one *two*'), [
+            TextNode('* one ', TextType.NORMAL),
+            TextNode('two', TextType.ITALIC),
+        ])
+        self.assertEqual(textnodes_from_markdown('**bold\nacross**'), [TextNode('bold\nacross', TextType.BOLD)])
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,137 @@
+import logging
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from site_builder.manifest import BuildManifest, remove_output, unchanged_entry
+
+LINK_MODES = ('copy', 'hardlink', 'reflink')
+_FICLONE = 0x40049409
+
+logger = logging.getLogger(__name__)
+
+class SyncStats:
+    def __init__(self):
+        self.copied = 0
+        self.copied_bytes = 0
+        self.skipped = 0
+        self.removed = 0
+        # url -> (width, height) of every image the optimizer handled
+        self.image_sizes = {}
+
+    def __str__(self):
+        return (f'Copied {self.copied} assets ({self.copied_bytes} bytes), '
+                f'skipped {self.skipped} unchanged, removed {self.removed} stale')
+
+def sync_assets(src_dir, dest_dir, manifest_path, workers=8, link_mode='copy', image_optimizer=None):
+    if link_mode not in LINK_MODES:
+        raise ValueError(f'link_mode must be one of {LINK_MODES}')
+    manifest = BuildManifest.load(manifest_path)
+    assets = discover_assets(src_dir)
+    stats = SyncStats()
+
+    for dest in manifest.remove_missing(set(assets)):
+        remove_output(dest, dest_dir)
+        stats.removed += 1
+
+    jobs = [(relative_path, stat, manifest.entries.get(relative_path)) for relative_path, stat in assets.items()]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(lambda job: _sync_asset(src_dir, dest_dir, link_mode, image_optimizer, *job), jobs)
+        for relative_path, entry, copied_bytes in results:
+            manifest.entries[relative_path] = entry
+            if entry.get('image_size') is not None:
+                stats.image_sizes['/' + relative_path.replace(os.sep, '/')] = tuple(entry['image_size'])
+            if copied_bytes is None:
+                stats.skipped += 1
+            else:
+                stats.copied += 1
+                stats.copied_bytes += copied_bytes
+
+    manifest.save()
+    logger.info('%s', stats)
+    return stats
+
+def discover_assets(src_dir):
+    assets = {}
+    pending = ['']
+    while pending:
+        relative_dir = pending.pop()
+        with os.scandir(os.path.join(src_dir, relative_dir)) as entries:
+            for entry in entries:
+                relative_path = os.path.join(relative_dir, entry.name)
+                if entry.is_file():
+                    assets[relative_path] = entry.stat()
+                elif entry.is_dir():
+                    pending.append(relative_path)
+    return assets
+
+def _sync_asset(src_dir, dest_dir, link_mode, image_optimizer, relative_path, stat, previous):
+    source = os.path.join(src_dir, relative_path)
+    dest = os.path.join(dest_dir, relative_path)
+    entry = {'dest': dest, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': None}
+    optimize = image_optimizer is not None and image_optimizer.handles(relative_path)
+    if optimize:
+        # optimized outputs differ from their source, so they are checked against the recorded output size
+        entry['image_size'] = None
+        entry['optimizer_version'] = image_optimizer.version
+        dest_matches = (previous is not None and previous.get('optimizer_version') == image_optimizer.version
+                        and _has_size(dest, previous['output_size']))
+    else:
+        dest_matches = previous is not None and 'image_size' not in previous and _has_size(dest, stat.st_size)
+
+    unchanged, entry['hash'] = unchanged_entry(previous if dest_matches and previous['dest'] == dest else None,
+                                               source, stat)
+    if unchanged is not None:
+        return relative_path, unchanged, None
+
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    if optimize:
+        entry['image_size'] = image_optimizer.write(source, dest, entry['hash'], link_mode)
+        entry['output_size'] = os.path.getsize(dest)
+        return relative_path, entry, entry['output_size']
+    copy_file(source, dest, link_mode)
+    return relative_path, entry, stat.st_size
+
+def _has_size(path, size):
+    try:
+        return os.stat(path).st_size == size
+    except OSError:
+        return False
+
+def copy_file(source, dest, link_mode='copy'):
+    if os.path.lexists(dest):
+        # never write through a hardlink into the source tree
+        os.remove(dest)
+    if link_mode == 'hardlink':
+        try:
+            os.link(source, dest)
+            return
+        except OSError:
+            pass
+    with open(source, 'rb') as source_file, open(dest, 'wb') as dest_file:
+        if link_mode == 'reflink':
+            try:
+                import fcntl
+                fcntl.ioctl(dest_file.fileno(), _FICLONE, source_file.fileno())
+                return
+            except (ImportError, OSError):
+                # fcntl is missing on Windows
+                pass
+        if _copy_file_range(source_file, dest_file):
+            return
+    shutil.copyfile(source, dest)
+
+def _copy_file_range(source_file, dest_file):
+    # in-kernel copy; shutil.copyfile falls back to sendfile where this is unavailable
+    if not hasattr(os, 'copy_file_range'):
+        return False
+    remaining = os.fstat(source_file.fileno()).st_size
+    try:
+        while remaining > 0:
+            copied = os.copy_file_range(source_file.fileno(), dest_file.fileno(), remaining)
+            if copied == 0:
+                break
+            remaining -= copied
+    except OSError:
+        return False
+    return remaining == 0
@@ -0,0 +1,150 @@
+import gzip
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import instrumentation
+from site_builder.assets import copy_file
+from site_builder.manifest import BuildManifest, unchanged_entry
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from compression import zstd
+except ImportError:
+    try:
+        import zstandard as zstd
+    except ImportError:
+        zstd = None
+
+COMPRESSIBLE_EXTENSIONS = ('.html', '.css', '.js', '.json', '.svg')
+
+logger = logging.getLogger(__name__)
+
+class CompressStats:
+    def __init__(self):
+        self.compressed = 0
+        self.uncompressed = 0
+        self.skipped = 0
+        self.saved_bytes = 0
+
+    def __str__(self):
+        return (f'Compressed {self.compressed} outputs (saving {self.saved_bytes} bytes), '
+                f'left {self.uncompressed} too small or incompressible, skipped {self.skipped} unchanged')
+
+def available_encodings():
+    # (file suffix, compress function) for gzip and whichever optional compressors are installed
+    encodings = [('.gz', lambda data: gzip.compress(data, 9, mtime=0))]
+    if brotli is not None:
+        encodings.append(('.br', lambda data: brotli.compress(data, quality=11)))
+    if zstd is not None:
+        if hasattr(zstd, 'ZstdCompressor'):
+            encodings.append(('.zst', lambda data: zstd.ZstdCompressor(level=19).compress(data)))
+        else:
+            encodings.append(('.zst', lambda data: zstd.compress(data, level=19)))
+    return encodings
+
+def compress_outputs(dest_dir, manifest_path, cache_dir, workers=8, min_size=1024, encodings=None, link_mode='copy'):
+    # Compressed copies are kept under cache_dir by the hash of their output and suffix, so content that was
+    # compressed once, in this or an earlier output tree, is copied (or linked) from there.
+    if encodings is None:
+        encodings = available_encodings()
+    suffixes = list(map(lambda encoding: encoding[0], encodings))
+    manifest = BuildManifest.load(manifest_path)
+    outputs = discover_compressible(dest_dir)
+    stats = CompressStats()
+
+    for dest in manifest.remove_missing(set(outputs)):
+        _remove_siblings(dest, suffixes)
+
+    jobs = [(relative_path, stat, manifest.entries.get(relative_path)) for relative_path, stat in outputs.items()]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(lambda job: _compress_output(dest_dir, cache_dir, encodings, min_size, link_mode, *job),
+                               jobs)
+        for relative_path, entry, saved_bytes in results:
+            manifest.entries[relative_path] = entry
+            if saved_bytes is None:
+                stats.skipped += 1
+            elif entry['encodings']:
+                stats.compressed += 1
+                stats.saved_bytes += saved_bytes
+            else:
+                stats.uncompressed += 1
+
+    manifest.save()
+    logger.info('%s', stats)
+    return stats
+
+def discover_compressible(dest_dir):
+    outputs = {}
+    for root, _, files in os.walk(dest_dir):
+        for name in files:
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                path = os.path.join(root, name)
+                outputs[os.path.relpath(path, dest_dir)] = os.stat(path)
+    return outputs
+
+def _compress_output(dest_dir, cache_dir, encodings, min_size, link_mode, relative_path, stat, previous):
+    path = os.path.join(dest_dir, relative_path)
+    suffixes = list(map(lambda encoding: encoding[0], encodings))
+    entry = {'dest': path, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': None, 'encodings': [],
+             'encodings_tried': suffixes, 'min_size': min_size}
+    if previous is not None and (previous['dest'] != path or previous['encodings_tried'] != suffixes
+                                 or previous['min_size'] != min_size):
+        previous = None
+    unchanged, entry['hash'] = unchanged_entry(previous, path, stat)
+    if unchanged is not None and _restore_siblings(cache_dir, path, unchanged, link_mode):
+        return relative_path, unchanged, None
+    if stat.st_size < min_size:
+        _remove_siblings(path, suffixes)
+        return relative_path, entry, 0
+
+    saved_bytes = 0
+    data = None
+    for suffix, compress in encodings:
+        cached = os.path.join(cache_dir, entry['hash'] + suffix)
+        if os.path.exists(cached):
+            instrumentation.count('compress_cache_hits')
+        else:
+            if data is None:
+                with open(path, 'rb') as output_file:
+                    data = output_file.read()
+            with instrumentation.phase('compress'):
+                compressed = compress(data)
+            if len(compressed) >= len(data):
+                _remove_siblings(path, (suffix,))
+                continue
+            _write_cached(cached, compressed)
+        copy_file(cached, path + suffix, link_mode)
+        entry['encodings'].append(suffix)
+        saved_bytes += stat.st_size - os.path.getsize(cached)
+    return relative_path, entry, saved_bytes
+
+def _restore_siblings(cache_dir, path, entry, link_mode):
+    # brings back compressed copies missing from a fresh output tree, or returns False if the cache lost one
+    for suffix in entry['encodings']:
+        if os.path.exists(path + suffix):
+            continue
+        cached = os.path.join(cache_dir, entry['hash'] + suffix)
+        if not os.path.exists(cached):
+            return False
+        copy_file(cached, path + suffix, link_mode)
+    return True
+
+def _write_cached(cached, data):
+    os.makedirs(os.path.dirname(cached), exist_ok=True)
+    tmp_path = f'{cached}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'wb') as cache_file:
+        cache_file.write(data)
+    os.replace(tmp_path, cached)
+
+def _remove_siblings(path, suffixes):
+    for suffix in suffixes:
+        try:
+            os.remove(path + suffix)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,117 @@
+import os
+import struct
+import threading
+import zlib
+
+import instrumentation
+from site_builder.assets import copy_file, discover_assets
+
+# bump when optimize_png changes, so cached outputs of the old version are not reused
+OPTIMIZER_VERSION = 2
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# critical chunks plus those that change how the pixels are displayed: transparency (tRNS) and colour space
+# (gAMA, cHRM, sRGB, iCCP); text, time and other ancillary chunks are dropped
+_KEPT_CHUNKS = frozenset((b'IHDR', b'PLTE', b'tRNS', b'gAMA', b'cHRM', b'sRGB', b'iCCP', b'IDAT', b'IEND'))
+_ANIMATION_CHUNKS = frozenset((b'acTL', b'fcTL', b'fdAT'))
+_STRATEGIES = (zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED)
+
+def read_chunks(data):
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError('not a PNG file')
+    position = len(PNG_SIGNATURE)
+    while position < len(data):
+        length, chunk_type = struct.unpack_from('>I4s', data, position)
+        end = position + 8 + length
+        if end + 4 > len(data):
+            raise ValueError(f'truncated {chunk_type!r} chunk')
+        yield chunk_type, data[position + 8:end]
+        position = end + 4
+        if chunk_type == b'IEND':
+            return
+    raise ValueError('missing IEND chunk')
+
+def png_size(data):
+    if not data.startswith(PNG_SIGNATURE) or data[12:16] != b'IHDR':
+        raise ValueError('not a PNG file')
+    return struct.unpack_from('>II', data, 16)
+
+def optimize_png(data):
+    # Lossless: the image data is only re-deflated, scanline filters are kept as they are. Ancillary chunks
+    # are dropped, except for animated PNGs, which are returned unchanged.
+    chunks = list(read_chunks(data))
+    chunk_types = set(map(lambda chunk: chunk[0], chunks))
+    if chunk_types & _ANIMATION_CHUNKS or b'IDAT' not in chunk_types:
+        return data
+    raw = zlib.decompress(b''.join(body for chunk_type, body in chunks if chunk_type == b'IDAT'))
+    compressed = min(map(lambda strategy: _deflate(raw, strategy), _STRATEGIES), key=len)
+
+    output = [PNG_SIGNATURE]
+    for chunk_type, body in chunks:
+        if chunk_type == b'IDAT':
+            if compressed is not None:
+                output.append(_chunk(b'IDAT', compressed))
+                compressed = None
+        elif chunk_type in _KEPT_CHUNKS:
+            output.append(_chunk(chunk_type, body))
+    optimized = b''.join(output)
+    return optimized if len(optimized) < len(data) else data
+
+def _deflate(raw, strategy):
+    compressor = zlib.compressobj(9, zlib.DEFLATED, 15, 9, strategy)
+    return compressor.compress(raw) + compressor.flush()
+
+def _chunk(chunk_type, body):
+    return struct.pack('>I', len(body)) + chunk_type + body + struct.pack('>I', zlib.crc32(chunk_type + body))
+
+def read_image_sizes(static_dir):
+    # url -> (width, height) of the PNGs under static_dir, from their headers alone
+    sizes = {}
+    for relative_path in discover_assets(static_dir):
+        if relative_path.lower().endswith('.png'):
+            with open(os.path.join(static_dir, relative_path), 'rb') as image_file:
+                try:
+                    sizes['/' + relative_path.replace(os.sep, '/')] = png_size(image_file.read(24))
+                except (ValueError, struct.error):
+                    pass
+    return sizes
+
+class ImageOptimizer:
+    # Optimized images are stored under cache_dir by the hash of their source, so an image is only ever
+    # processed once; outputs are copied (or linked) from there.
+    version = OPTIMIZER_VERSION
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def handles(self, path):
+        return path.lower().endswith('.png')
+
+    def write(self, source, dest, source_hash, link_mode='copy'):
+        # returns the image's (width, height), or None if it is not a valid PNG
+        cached = os.path.join(self.cache_dir, f'{source_hash}-{OPTIMIZER_VERSION}.png')
+        if os.path.exists(cached):
+            instrumentation.count('image_cache_hits')
+        else:
+            with instrumentation.phase('images'):
+                self._optimize(source, cached)
+            instrumentation.count('images_optimized')
+        copy_file(cached, dest, link_mode)
+        with open(cached, 'rb') as image_file:
+            try:
+                return png_size(image_file.read(24))
+            except (ValueError, struct.error):
+                return None
+
+    def _optimize(self, source, cached):
+        with open(source, 'rb') as source_file:
+            data = source_file.read()
+        try:
+            data = optimize_png(data)
+        except (ValueError, struct.error, zlib.error):
+            pass
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f'{cached}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as cache_file:
+            cache_file.write(data)
+        os.replace(tmp_path, cached)
@@ -0,0 +1,102 @@
+import logging
+import posixpath
+from html import escape
+from urllib.parse import urlsplit
+
+import instrumentation
+from htmlnode import resolve_url
+from site_builder.assets import discover_assets
+from site_builder.pages import discover_pages, page_url, read_document
+
+logger = logging.getLogger(__name__)
+
+class BrokenLinksError(Exception):
+    def __init__(self, broken):
+        self.broken = broken
+        details = ''.join(map(lambda link: f'\n  {link[0]}: {link[1]}', broken))
+        super().__init__(f'{len(broken)} broken internal link(s):{details}')
+
+class LinkGraph:
+    # Internal links between pages, keyed by site-relative page url (without basepath).
+    def __init__(self):
+        self.pages = {}
+        self.links = {}
+        self.broken = []
+
+    def inbound(self):
+        counts = dict.fromkeys(self.pages, 0)
+        for source_url, targets in self.links.items():
+            for target in targets:
+                if target != source_url and target in counts:
+                    counts[target] += 1
+        return counts
+
+    def orphans(self):
+        return sorted(url for url, count in self.inbound().items() if count == 0 and url != '/')
+
+    def most_linked(self, count):
+        inbound = self.inbound()
+        ranked = sorted((url for url in inbound if inbound[url] > 0), key=lambda url: (-inbound[url], url))
+        return ranked[:count]
+
+def build_link_graph(dir_path_content, dest_dir_path, static_dir_path, parse_cache=None):
+    graph = LinkGraph()
+    pages = discover_pages(dir_path_content, dest_dir_path)
+    targets = {}
+    for source, dest in pages:
+        url = page_url(dest, dest_dir_path, '/')
+        graph.pages[url] = source
+        targets[_target_key(url)] = url
+        if url.endswith('/'):
+            targets[_target_key(url + 'index.html')] = url
+    for relative_path in discover_assets(static_dir_path):
+        targets[_target_key('/' + relative_path.replace('\\', '/'))] = None
+
+    checked = 0
+    for source, dest in pages:
+        url = page_url(dest, dest_dir_path, '/')
+        try:
+            images, links = read_document(source, parse_cache).references
+        except Exception as e:
+            logger.warning('Not checking links of %s: %s: %s', source, type(e).__name__, e)
+            continue
+        with instrumentation.phase('links'):
+            page_links = []
+            for _, href in images + links:
+                path = _internal_path(href, url)
+                if path is None:
+                    continue
+                checked += 1
+                key = _target_key(path)
+                if key not in targets:
+                    graph.broken.append((source, href))
+                elif targets[key] is not None:
+                    page_links.append(targets[key])
+            graph.links[url] = page_links
+
+    for source, href in graph.broken:
+        logger.warning('Broken link in %s: %s', source, href)
+    orphans = graph.orphans()
+    for url in orphans:
+        logger.info('Orphan page %s (%s) is not linked from any other page', url, graph.pages[url])
+    logger.info('Checked %d internal links on %d pages: %d broken, %d orphan pages', checked, len(pages),
+                len(graph.broken), len(orphans))
+    return graph
+
+def prefetch_hints(graph, basepath, count):
+    return ''.join(map(lambda url: f'<link rel="prefetch" href="{escape(resolve_url(url, basepath))}">',
+                       graph.most_linked(count)))
+
+def _internal_path(href, page):
+    # site-relative path of a link, or None for external links, bare fragments and other schemes
+    parts = urlsplit(href)
+    if parts.scheme or parts.netloc or parts.path == '':
+        return None
+    path = parts.path
+    if not path.startswith('/'):
+        directory = page if page.endswith('/') else posixpath.dirname(page).rstrip('/') + '/'
+        path = directory + path
+    return path
+
+def _target_key(path):
+    return posixpath.normpath(path) if path != '/' else '/'
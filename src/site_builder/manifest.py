@@ -0,0 +1,82 @@
+import hashlib
+import json
+import logging
+import os
+
+MANIFEST_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+def hash_file(path, chunk_size=1 << 16):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        while chunk := file.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class BuildManifest:
+    def __init__(self, path, entries=None):
+        self.path = path
+        self.entries = entries if entries is not None else {}
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, 'r') as manifest_file:
+                data = json.load(manifest_file)
+        except (OSError, ValueError):
+            return cls(path)
+        if not isinstance(data, dict) or data.get('version') != MANIFEST_VERSION:
+            return cls(path)
+        return cls(path, data.get('pages', {}))
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory != '' and not os.path.exists(directory):
+            os.makedirs(directory)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as manifest_file:
+            json.dump({'version': MANIFEST_VERSION, 'pages': self.entries}, manifest_file, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def is_up_to_date(self, source, dest, inputs):
+        entry = self.entries.get(source)
+        return entry is not None and entry['dest'] == dest and entry['inputs'] == inputs and os.path.exists(dest)
+
+    def record(self, source, dest, inputs):
+        self.entries[source] = {'dest': dest, 'inputs': inputs}
+
+    def remove_missing(self, sources):
+        stale = [source for source in self.entries if source not in sources]
+        return [self.entries.pop(source)['dest'] for source in stale]
+
+def unchanged_entry(previous, path, stat):
+    # (entry, hash of path): previous, updated to stat's size and mtime, if path still has the content previous
+    # recorded, else None. The file is only hashed when there is no previous entry or its size or mtime changed.
+    if previous is not None and previous['size'] == stat.st_size and previous['mtime_ns'] == stat.st_mtime_ns:
+        return previous, previous['hash']
+    file_hash = hash_file(path)
+    if previous is not None and previous['hash'] == file_hash:
+        return dict(previous, size=stat.st_size, mtime_ns=stat.st_mtime_ns), file_hash
+    return None, file_hash
+
+def open_output(path, mode='w', **kwargs):
+    # outputs may be hardlinks to published or static files, so they are replaced instead of written in place
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    return open(path, mode, **kwargs)
+
+def remove_output(path, root):
+    if os.path.exists(path):
+        logger.info('Removing stale output %s', path)
+        os.remove(path)
+    directory = os.path.dirname(path)
+    root = os.path.normpath(root)
+    while os.path.normpath(directory) != root and os.path.isdir(directory) and not os.listdir(directory):
+        os.rmdir(directory)
+        directory = os.path.dirname(directory)
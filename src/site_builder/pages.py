@@ -0,0 +1,238 @@
+import json
+import logging
+import os
+
+import instrumentation
+from markdown_converters.document import Document, StreamingDocument
+from markdown_converters.markdown_to_blocks import markdown_to_blocks
+from site_builder.assets import discover_assets
+from site_builder.manifest import BuildManifest, hash_file, hash_bytes, open_output, remove_output
+from site_builder.shards import select_shard
+from site_builder.template import load_template
+from textnode import image_sizes, set_image_sizes
+
+logger = logging.getLogger(__name__)
+
+# sources larger than this are converted while they are read instead of being loaded whole
+STREAMING_THRESHOLD = 16 * 1024 * 1024
+
+class PageGenerationError(Exception):
+    def __init__(self, failures):
+        self.failures = failures
+        details = ''.join(map(lambda failure: f'\n  {failure[0]}: {failure[1]}', failures))
+        super().__init__(f'{len(failures)} page(s) failed to generate:{details}')
+
+def generate_page(from_path, template_path, dest_path, basepath, parse_cache=None, extra_values=None):
+    _log_page(from_path, template_path, dest_path)
+    _write_page(from_path, template_path, dest_path, basepath, parse_cache, extra_values)
+
+def _log_page(from_path, template_path, dest_path):
+    logger.debug('Generating page from %s to %s using %s', from_path, dest_path, template_path)
+
+def _write_page(from_path, template_path, dest_path, basepath, parse_cache=None, extra_values=None):
+    with instrumentation.page(from_path):
+        document = read_document(from_path, parse_cache)
+        write_document(document, load_template(template_path, basepath), dest_path, basepath, extra_values)
+
+def read_document(path, parse_cache=None):
+    if os.path.getsize(path) > STREAMING_THRESHOLD:
+        instrumentation.count('streamed_pages')
+        return StreamingDocument(path)
+    with instrumentation.phase('read'):
+        with open(path, 'r') as markdown_file:
+            markdown = markdown_file.read()
+    instrumentation.count('bytes_read', len(markdown))
+    return load_document(markdown, parse_cache)
+
+def load_document(markdown, parse_cache=None):
+    if parse_cache is None:
+        return Document(markdown)
+    source_hash = hash_bytes(markdown.encode())
+    blocks = parse_cache.get(source_hash)
+    document = Document(markdown, blocks)
+    if blocks is None:
+        parse_cache.put(source_hash, document.blocks, markdown_to_blocks(markdown))
+    return document
+
+def render_document(document, template, basepath, extra_values=None):
+    return template.render(_page_values(document, basepath, extra_values))
+
+def write_document(document, template, dest_path, basepath, extra_values=None):
+    values = _page_values(document, basepath, extra_values)
+    if instrumentation.active() is None or document.streaming:
+        with instrumentation.phase('write'):
+            with open_output(dest_path) as output_file:
+                template.write(output_file, values)
+        instrumentation.count('pages')
+        return
+
+    # buffered while profiling, so rendering, templating and writing can be timed on their own
+    with instrumentation.phase('to_html'):
+        content = list(document.iter_html(basepath))
+    values['Content'] = content
+    with instrumentation.phase('template'):
+        chunks = list(template.render(values))
+    with instrumentation.phase('write'):
+        with open_output(dest_path) as output_file:
+            output_file.writelines(chunks)
+    instrumentation.count('pages')
+
+def _page_values(document, basepath, extra_values):
+    values = {
+        'Title': document.title,
+        'Content': lambda: document.iter_html(basepath),
+        'Basepath': basepath,
+        'Prefetch': '',
+    }
+    if extra_values:
+        values.update(extra_values)
+    return values
+
+def discover_pages(dir_path_content, dest_dir_path):
+    pages = []
+    pending = [(dir_path_content, dest_dir_path)]
+    while pending:
+        source_dir, dest_dir = pending.pop()
+        with os.scandir(source_dir) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    pages.append((source_dir + entry.name, dest_dir + entry.name.replace('.md', '.html')))
+                elif entry.is_dir():
+                    pending.append((source_dir + entry.name + '/', dest_dir + entry.name + '/'))
+    pages.sort()
+    return pages
+
+def remove_stale_pages(dir_path_content, static_dir, dest_dir_path, shard=None):
+    # Removes .html files left in dest_dir_path by an earlier build that no page (of shard, if given) and no
+    # static file produces any more. Returns the number removed.
+    pages = discover_pages(dir_path_content, dest_dir_path)
+    if shard is not None:
+        pages = select_shard(pages, dir_path_content, shard)
+    outputs = set(os.path.normpath(dest) for _, dest in pages)
+    outputs.update(os.path.normpath(os.path.join(dest_dir_path, relative_path))
+                   for relative_path in discover_assets(static_dir))
+    stale = []
+    for root, _, names in os.walk(dest_dir_path):
+        for name in names:
+            path = os.path.normpath(os.path.join(root, name))
+            if name.endswith('.html') and path not in outputs:
+                stale.append(path)
+    for path in stale:
+        remove_output(path, dest_dir_path)
+    return len(stale)
+
+def page_url(dest, dest_dir_path, basepath):
+    url = os.path.relpath(dest, dest_dir_path).replace(os.sep, '/')
+    if url == 'index.html':
+        url = ''
+    elif url.endswith('/index.html'):
+        url = url[:-len('index.html')]
+    return basepath + url
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath, workers=1, parse_cache=None,
+                             extra_values=None, shard=None):
+    # shard is None, or an (index, count) pair to only generate that shard's pages
+    os.makedirs(dest_dir_path, exist_ok=True)
+    jobs = discover_pages(dir_path_content, dest_dir_path)
+    if shard is not None:
+        jobs = select_shard(jobs, dir_path_content, shard)
+    failures = generate_pages(jobs, template_path, basepath, workers, parse_cache, extra_values)
+    if failures:
+        raise PageGenerationError(failures)
+
+def generate_pages(jobs, template_path, basepath, workers=1, parse_cache=None, extra_values=None):
+    for dest_dir in sorted(set(os.path.dirname(dest) for _, dest in jobs)):
+        os.makedirs(dest_dir, exist_ok=True)
+    if workers == 1 or len(jobs) <= 1:
+        return list(filter(None, map(
+            lambda job: _generate_job(job, template_path, basepath, parse_cache, extra_values, True)[0], jobs)))
+    return _generate_pages_parallel(jobs, template_path, basepath, workers, parse_cache, extra_values)
+
+def _generate_job(job, template_path, basepath, parse_cache=None, extra_values=None, log=False, profile=None):
+    # profile is None, or whether a worker process should profile the page, including its memory
+    source, dest = job
+    if log:
+        _log_page(source, template_path, dest)
+    if profile is not None:
+        instrumentation.activate(instrumentation.Profiler(trace_memory=profile))
+    try:
+        _write_page(source, template_path, dest, basepath, parse_cache, extra_values)
+        failure = None
+    except Exception as e:
+        failure = source, f'{type(e).__name__}: {e}'
+    if profile is not None:
+        return failure, instrumentation.deactivate().snapshot()
+    return failure, None
+
+def _generate_pages_parallel(jobs, template_path, basepath, workers, parse_cache, extra_values):
+    # largest pages first so no worker is left with a big page at the end
+    by_size = sorted(range(len(jobs)), key=lambda i: (-os.path.getsize(jobs[i][0]), i))
+    results = [None] * len(jobs)
+    done = [False] * len(jobs)
+    logged = 0
+    profiler = instrumentation.active()
+    profile = None if profiler is None else profiler.trace_memory
+    # imported on first use, it pulls in multiprocessing which serial builds never need
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    with ProcessPoolExecutor(max_workers=workers or None, initializer=set_image_sizes,
+                             initargs=(image_sizes(),)) as executor:
+        futures = {executor.submit(_generate_job, jobs[i], template_path, basepath, parse_cache, extra_values, False,
+                                   profile): i for i in by_size}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[i], snapshot = future.result()
+                if snapshot is not None:
+                    profiler.merge(snapshot)
+            except Exception as e:
+                results[i] = jobs[i][0], f'{type(e).__name__}: {e}'
+            done[i] = True
+            # log in discovery order, independent of completion order
+            while logged < len(jobs) and done[logged]:
+                _log_page(jobs[logged][0], template_path, jobs[logged][1])
+                logged += 1
+    return list(filter(None, results))
+
+def generate_pages_incremental(dir_path_content, template_path, dest_dir_path, basepath, manifest_path, workers=1,
+                               parse_cache=None, extra_values=None, shard=None):
+    manifest = BuildManifest.load(manifest_path)
+    template_files = (template_path,) + load_template(template_path, basepath).dependencies
+    template_hash = hash_bytes(''.join(map(hash_file, template_files)).encode())
+    basepath_hash = hash_bytes(basepath.encode())
+    values_hash = hash_bytes(json.dumps(extra_values or {}, sort_keys=True).encode())
+    images_hash = hash_bytes(json.dumps(sorted(image_sizes().items())).encode())
+
+    pages = discover_pages(dir_path_content, dest_dir_path)
+    if shard is not None:
+        pages = select_shard(pages, dir_path_content, shard)
+    sources = set(source for source, _ in pages)
+    removed = manifest.remove_missing(sources)
+
+    jobs = []
+    job_inputs = {}
+    for source, dest in pages:
+        inputs = {'source': hash_file(source), 'template': template_hash, 'basepath': basepath_hash,
+                  'values': values_hash, 'images': images_hash}
+        if manifest.is_up_to_date(source, dest, inputs):
+            continue
+        previous = manifest.entries.pop(source, None)
+        if previous is not None and previous['dest'] != dest:
+            removed.append(previous['dest'])
+        jobs.append((source, dest))
+        job_inputs[source] = inputs
+
+    failures = generate_pages(jobs, template_path, basepath, workers, parse_cache, extra_values)
+    failed = set(source for source, _ in failures)
+    for source, dest in jobs:
+        if source not in failed:
+            manifest.record(source, dest, job_inputs[source])
+
+    for dest in removed:
+        remove_output(dest, dest_dir_path)
+
+    manifest.save()
+    generated = len(jobs) - len(failures)
+    logger.info('Generated %d of %d pages, removed %d stale pages', generated, len(pages), len(removed))
+    if failures:
+        raise PageGenerationError(failures)
+    return generated, len(removed)
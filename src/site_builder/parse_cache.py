@@ -0,0 +1,122 @@
+import hashlib
+import marshal
+import os
+import threading
+
+import instrumentation
+import textnode
+from markdown_converters import document, markdown_to_blocks, markdown_to_text_node
+from markdown_converters.block_memo import block_memo
+from markdown_converters.markdown_to_blocks import BlockType, TextBlock
+from textnode import TextNode, TextType
+
+CACHE_FORMAT = 2
+
+_BLOCK_TYPES = list(BlockType)
+_TEXT_TYPES = list(TextType)
+_BLOCK_TYPE_INDEX = {block_type: index for index, block_type in enumerate(_BLOCK_TYPES)}
+_TEXT_TYPE_INDEX = {text_type: index for index, text_type in enumerate(_TEXT_TYPES)}
+_PARSER_MODULES = (markdown_to_blocks, markdown_to_text_node, document, textnode)
+_parser_version = None
+
+def parser_version():
+    # Changes whenever any parser module changes, so stale entries are simply never looked up again.
+    global _parser_version
+    if _parser_version is None:
+        digest = hashlib.sha256(str(CACHE_FORMAT).encode())
+        for module in _PARSER_MODULES:
+            with open(module.__file__, 'rb') as module_file:
+                digest.update(module_file.read())
+        _parser_version = digest.hexdigest()[:16]
+    return _parser_version
+
+class ParseCache:
+    # Parsed TextBlocks on disk, keyed by source hash and parser version. Reads refresh an entry's mtime,
+    # and once the directory grows past max_bytes the least recently used entries are evicted.
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._size = None
+
+    def get(self, source_hash):
+        path = self._path(source_hash)
+        with instrumentation.phase('cache'):
+            try:
+                with open(path, 'rb') as cache_file:
+                    blocks = decode_blocks(marshal.load(cache_file))
+                os.utime(path)
+            except (OSError, EOFError, ValueError, TypeError, IndexError):
+                instrumentation.count('parse_cache_misses')
+                return None
+        instrumentation.count('parse_cache_hits')
+        return blocks
+
+    def put(self, source_hash, blocks, block_texts=None):
+        path = self._path(source_hash)
+        with instrumentation.phase('cache'):
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'wb') as cache_file:
+                marshal.dump(encode_blocks(blocks, block_texts), cache_file)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+            if self._size is None:
+                self._size = self._directory_size()
+            else:
+                self._size += size
+            if self._size > self.max_bytes:
+                self.evict()
+
+    def evict(self):
+        entries = []
+        with os.scandir(self.directory) as directory:
+            for entry in directory:
+                if entry.is_file() and entry.name.endswith('.bin'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        entries.sort()
+        size = sum(map(lambda entry: entry[1], entries))
+        # evict down to 90% so a full cache does not rescan the directory on every write
+        target = self.max_bytes * 9 // 10
+        for _, entry_size, path in entries:
+            if size <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+        self._size = size
+
+    def _directory_size(self):
+        try:
+            with os.scandir(self.directory) as directory:
+                return sum(entry.stat().st_size for entry in directory if entry.name.endswith('.bin'))
+        except FileNotFoundError:
+            return 0
+
+    def _path(self, source_hash):
+        return os.path.join(self.directory, f'{source_hash}-{parser_version()}.bin')
+
+def encode_blocks(blocks, block_texts=None):
+    # with the markdown text of each block stored too, decoding can share blocks through the block memo
+    if block_texts is None:
+        block_texts = [None] * len(blocks)
+    return [(text, _BLOCK_TYPE_INDEX[block.block_type], block.additional_info, _encode_children(block.children))
+            for block, text in zip(blocks, block_texts)]
+
+def decode_blocks(data):
+    return [_decode_block(*block) if block[0] is None else block_memo.text_block(block[0], _decode_block, *block)
+            for block in data]
+
+def _decode_block(text, block_type, additional_info, children):
+    return TextBlock(_BLOCK_TYPES[block_type], _decode_children(children), additional_info)
+
+def _encode_children(children):
+    # TextNodes become tuples, nested lists of list and quote lines stay lists
+    return [(child.text, _TEXT_TYPE_INDEX[child.text_type], child.url) if isinstance(child, TextNode)
+            else _encode_children(child) for child in children]
+
+def _decode_children(children):
+    return [TextNode(child[0], _TEXT_TYPES[child[1]], child[2]) if isinstance(child, tuple)
+            else _decode_children(child) for child in children]
@@ -0,0 +1,164 @@
+import ctypes
+import json
+import logging
+import os
+import shutil
+import sys
+
+from site_builder.manifest import hash_file
+
+# Written to the publish directory under .cache on every publish:
+#   manifest.json   {"version": 1, "files": {path: {"size", "hash", "mtime_ns"}}} of the published output
+#   diff.json       {"added": [path, ...], "changed": [...], "removed": [...]} against the previous manifest
+PUBLISH_MANIFEST_VERSION = 1
+
+_AT_FDCWD = -100
+_RENAME_EXCHANGE = 2
+
+logger = logging.getLogger(__name__)
+
+class PublishStats:
+    def __init__(self):
+        self.added = []
+        self.changed = []
+        self.removed = []
+        self.preserved = 0
+
+    def to_json(self):
+        return {'added': self.added, 'changed': self.changed, 'removed': self.removed}
+
+    def __str__(self):
+        return (f'Published {len(self.added)} added, {len(self.changed)} changed and {len(self.removed)} removed '
+                f'files, kept {self.preserved} unchanged rebuilt files')
+
+def staging_dir(dest_dir):
+    # a sibling of the output directory, so both are on one filesystem and can be swapped by renaming
+    dest_dir = os.path.normpath(dest_dir)
+    return os.path.join(os.path.dirname(dest_dir), f'.{os.path.basename(dest_dir)}.staging', '')
+
+def stage(dest_dir, seed=True):
+    # Returns a staging directory that hardlinks every published file, so unchanged assets, pages and compressed
+    # copies are recognised and kept instead of rewritten, or with seed=False an empty one. Outputs are written
+    # through open_output or copy_file, which replace a file instead of writing into it, so the published tree is
+    # never modified by a build.
+    staging = staging_dir(dest_dir)
+    if os.path.exists(staging):
+        shutil.rmtree(staging)
+    if seed and os.path.isdir(dest_dir):
+        shutil.copytree(dest_dir, staging, copy_function=_link_or_copy)
+    else:
+        os.makedirs(staging)
+    return staging
+
+def publish(staging, dest_dir, manifest_dir):
+    manifest_path = os.path.join(manifest_dir, 'manifest.json')
+    previous = _load_manifest(manifest_path)
+    stats = PublishStats()
+    files = {}
+    for relative_path in _files(staging):
+        files[relative_path] = _publish_entry(staging, dest_dir, relative_path, previous.get(relative_path), stats)
+
+    for relative_path, entry in files.items():
+        if relative_path not in previous:
+            stats.added.append(relative_path)
+        elif previous[relative_path]['hash'] != entry['hash']:
+            stats.changed.append(relative_path)
+    stats.removed = sorted(relative_path for relative_path in previous if relative_path not in files)
+
+    os.makedirs(manifest_dir, exist_ok=True)
+    _write_json(manifest_path, {'version': PUBLISH_MANIFEST_VERSION, 'files': files})
+    _write_json(os.path.join(manifest_dir, 'diff.json'), stats.to_json())
+    swap_directories(staging, dest_dir)
+    logger.info('%s', stats)
+    return stats
+
+def _publish_entry(staging, dest_dir, relative_path, previous, stats):
+    staged = os.path.join(staging, relative_path)
+    published = os.path.join(dest_dir, relative_path)
+    staged_stat = os.stat(staged)
+    try:
+        published_stat = os.stat(published)
+    except OSError:
+        published_stat = None
+    if published_stat is not None and os.path.samestat(staged_stat, published_stat):
+        return _file_entry(published, published_stat, previous)
+
+    entry = _file_entry(staged, staged_stat, None)
+    if published_stat is not None and published_stat.st_size == staged_stat.st_size:
+        published_entry = _file_entry(published, published_stat, previous)
+        if published_entry['hash'] == entry['hash'] and _replace_with_link(published, staged):
+            # a rebuilt file with unchanged content keeps the published file and its mtime
+            stats.preserved += 1
+            return published_entry
+    return entry
+
+def _file_entry(path, stat, previous):
+    # the hash is taken from the previous manifest while the file's size and mtime still match it
+    if previous is not None and previous['size'] == stat.st_size and previous['mtime_ns'] == stat.st_mtime_ns:
+        return previous
+    return {'size': stat.st_size, 'hash': hash_file(path), 'mtime_ns': stat.st_mtime_ns}
+
+def swap_directories(staging, dest_dir):
+    # Exchanges the directories in one rename where the platform supports it, otherwise the old output is moved
+    # aside first, leaving a moment without an output directory. The old output is removed afterwards.
+    staging = os.path.normpath(staging)
+    dest_dir = os.path.normpath(dest_dir)
+    if not os.path.exists(dest_dir):
+        os.rename(staging, dest_dir)
+        return
+    if not _exchange(staging, dest_dir):
+        old = staging + '.old'
+        if os.path.exists(old):
+            shutil.rmtree(old)
+        os.rename(dest_dir, old)
+        os.rename(staging, dest_dir)
+        staging = old
+    shutil.rmtree(staging)
+
+def _exchange(first, second):
+    # renameat2 is Linux only; elsewhere CDLL(None) fails, with TypeError on Windows
+    if not sys.platform.startswith('linux'):
+        return False
+    try:
+        renameat2 = ctypes.CDLL(None, use_errno=True).renameat2
+    except (OSError, AttributeError):
+        return False
+    return renameat2(_AT_FDCWD, os.fsencode(first), _AT_FDCWD, os.fsencode(second), _RENAME_EXCHANGE) == 0
+
+def _link_or_copy(source, dest):
+    try:
+        os.link(source, dest)
+    except OSError:
+        shutil.copy2(source, dest)
+
+def _replace_with_link(source, dest):
+    tmp_path = dest + '.publish.tmp'
+    try:
+        os.link(source, tmp_path)
+    except OSError:
+        return False
+    os.replace(tmp_path, dest)
+    return True
+
+def _files(root):
+    files = []
+    for directory, _, names in os.walk(root):
+        for name in names:
+            files.append(os.path.relpath(os.path.join(directory, name), root).replace(os.sep, '/'))
+    return sorted(files)
+
+def _load_manifest(path):
+    try:
+        with open(path, 'r') as manifest_file:
+            data = json.load(manifest_file)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get('version') != PUBLISH_MANIFEST_VERSION:
+        return {}
+    return data.get('files', {})
+
+def _write_json(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as json_file:
+        json.dump(data, json_file, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
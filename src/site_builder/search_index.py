@@ -0,0 +1,160 @@
+import json
+import logging
+import os
+import re
+
+import instrumentation
+from markdown_converters.document import plain_text
+from markdown_converters.markdown_to_blocks import BlockType
+from site_builder.manifest import BuildManifest, hash_file, open_output, remove_output
+from site_builder.pages import discover_pages, page_url, read_document
+from textnode import TextNode
+
+# Written to <output>/search/:
+#   index.json        {"version": 1, "pages": [[url, title], ...], "shards": {prefix: file name}}
+#   <shard>.json      {term: [page id, weight, page id, weight, ...]}
+# A term is in the shard with the longest prefix of it, so a client fetches index.json once and then only the
+# shard a query term maps to. Shards over max_shard_bytes are split by one more character of prefix.
+INDEX_VERSION = 1
+HEADING_WEIGHT = 3
+
+_TOKEN = re.compile(r'\w{2,}')
+
+logger = logging.getLogger(__name__)
+
+def tokenize(text):
+    return _TOKEN.findall(text.lower())
+
+def page_terms(document):
+    terms = {}
+    for block in document.iter_blocks():
+        weight = HEADING_WEIGHT if block.block_type == BlockType.HEADING else 1
+        for text in _block_texts(block):
+            for term in tokenize(text):
+                terms[term] = terms.get(term, 0) + weight
+    return terms
+
+def _block_texts(block):
+    # list and quote blocks hold one list of text nodes per line
+    if block.children and not isinstance(block.children[0], TextNode):
+        return map(plain_text, block.children)
+    return (plain_text(block.children),)
+
+class SearchIndex:
+    # Per-page terms are kept in a manifest under .cache, so only new or edited pages are tokenized again and
+    # only the shards whose postings changed are rewritten.
+    def __init__(self, manifest, max_shard_bytes=32 * 1024):
+        self.manifest = manifest
+        self.max_shard_bytes = max_shard_bytes
+        self._next_id = max((entry['id'] for entry in manifest.entries.values()), default=-1) + 1
+
+    @classmethod
+    def load(cls, path, max_shard_bytes=32 * 1024):
+        return cls(BuildManifest.load(path), max_shard_bytes)
+
+    def is_up_to_date(self, source, url, source_hash):
+        entry = self.manifest.entries.get(source)
+        return entry is not None and entry['dest'] == url and entry['inputs'] == {'source': source_hash}
+
+    def update(self, source, url, document, source_hash):
+        with instrumentation.phase('search'):
+            entry = self.manifest.entries.get(source)
+            if entry is not None:
+                page_id = entry['id']
+            else:
+                page_id = self._next_id
+                self._next_id += 1
+            self.manifest.entries[source] = {
+                'dest': url,
+                'inputs': {'source': source_hash},
+                'id': page_id,
+                'title': document.title,
+                'terms': page_terms(document),
+            }
+
+    def remove_missing(self, sources):
+        return len(self.manifest.remove_missing(sources))
+
+    def write(self, search_dir):
+        # returns the number of shard files written and removed
+        with instrumentation.phase('search'):
+            shards = self._shards()
+            files = {prefix: f'{prefix.encode().hex() or "_"}.json' for prefix in shards}
+            pages = [None] * self._next_id
+            for entry in self.manifest.entries.values():
+                pages[entry['id']] = [entry['dest'], entry['title']]
+            index = _dumps({'version': INDEX_VERSION, 'pages': pages, 'shards': files})
+
+            written = 0
+            os.makedirs(search_dir, exist_ok=True)
+            for prefix, content in shards.items():
+                written += _write_if_changed(os.path.join(search_dir, files[prefix]), content)
+            _write_if_changed(os.path.join(search_dir, 'index.json'), index)
+            removed = 0
+            current = set(files.values())
+            current.add('index.json')
+            for name in os.listdir(search_dir):
+                if name.endswith('.json') and name not in current:
+                    remove_output(os.path.join(search_dir, name), search_dir)
+                    removed += 1
+        return written, removed
+
+    def save(self):
+        self.manifest.save()
+
+    def _shards(self):
+        postings = {}
+        for entry in sorted(self.manifest.entries.values(), key=lambda entry: entry['id']):
+            for term, weight in entry['terms'].items():
+                postings.setdefault(term, []).extend((entry['id'], weight))
+        shards = {}
+        self._split(sorted(map(lambda term: (term, _dumps(postings[term])), postings)), 1, shards)
+        return shards
+
+    def _split(self, terms, length, shards):
+        groups = {}
+        for term in terms:
+            groups.setdefault(term[0][:length], []).append(term)
+        for prefix, group in groups.items():
+            size = sum(map(lambda term: len(term[0]) + len(term[1]) + 6, group))
+            if size > self.max_shard_bytes and any(map(lambda term: len(term[0]) > length, group)):
+                self._split(group, length + 1, shards)
+            else:
+                shards[prefix] = '{' + ','.join(map(lambda term: f'{_dumps(term[0])}:{term[1]}', group)) + '}'
+
+def build_search_index(dir_path_content, dest_dir_path, basepath, manifest_path, parse_cache=None,
+                       max_shard_bytes=32 * 1024):
+    index = SearchIndex.load(manifest_path, max_shard_bytes)
+    pages = discover_pages(dir_path_content, dest_dir_path)
+    removed = index.remove_missing(set(source for source, _ in pages))
+    updated = 0
+    for source, dest in pages:
+        url = page_url(dest, dest_dir_path, basepath)
+        source_hash = hash_file(source)
+        if index.is_up_to_date(source, url, source_hash):
+            continue
+        try:
+            document = read_document(source, parse_cache)
+            index.update(source, url, document, source_hash)
+            updated += 1
+        except Exception as e:
+            logger.warning('Not indexing %s: %s: %s', source, type(e).__name__, e)
+    written, _ = index.write(os.path.join(dest_dir_path, 'search'))
+    index.save()
+    logger.info('Indexed %d of %d pages for search, removed %d, wrote %d shards', updated, len(pages), removed,
+                written)
+    return index
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+def _write_if_changed(path, content):
+    try:
+        with open(path, 'r', encoding='utf-8') as existing:
+            if existing.read() == content:
+                return 0
+    except OSError:
+        pass
+    with open_output(path, encoding='utf-8') as output:
+        output.write(content)
+    return 1
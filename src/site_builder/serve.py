@@ -0,0 +1,241 @@
+import hashlib
+import logging
+import mimetypes
+import os
+import posixpath
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+import instrumentation
+from site_builder.images import read_image_sizes
+from site_builder.pages import read_document, render_document
+from site_builder.template import load_template
+from textnode import set_image_sizes
+
+logger = logging.getLogger(__name__)
+
+class RenderedPage:
+    def __init__(self, key, body, mtime):
+        self.key = key
+        self.body = body
+        self.mtime = mtime
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+class PageCache:
+    # Bounded LRU of rendered pages. An entry is only used while its key (source stat and compiled template) is
+    # current, and concurrent misses for the same source wait for a single render.
+    def __init__(self, render, max_pages=256):
+        self.render = render
+        self.max_pages = max_pages
+        self.renders = 0
+        self._pages = OrderedDict()
+        self._rendering = {}
+        self._lock = threading.Lock()
+
+    def get(self, source, key, mtime):
+        while True:
+            with self._lock:
+                page = self._pages.get(source)
+                if page is not None and page.key == key:
+                    self._pages.move_to_end(source)
+                    instrumentation.count('serve_cache_hits')
+                    return page
+                pending = self._rendering.get(source)
+                if pending is None:
+                    pending = self._rendering[source] = (key, threading.Event())
+                    break
+            pending[1].wait()
+
+        try:
+            page = RenderedPage(key, self.render(source), mtime)
+            with self._lock:
+                self.renders += 1
+                self._pages[source] = page
+                self._pages.move_to_end(source)
+                while len(self._pages) > self.max_pages:
+                    self._pages.popitem(last=False)
+            return page
+        finally:
+            with self._lock:
+                del self._rendering[source]
+            pending[1].set()
+
+    def __len__(self):
+        return len(self._pages)
+
+class SiteServer:
+    # Renders pages from content_dir when they are first requested instead of building the whole site, and
+    # serves static_dir as it is. Urls map to sources the way discover_pages maps sources to outputs.
+    def __init__(self, content_dir, static_dir, template_path, basepath='/', parse_cache=None, max_pages=256):
+        self.content_dir = content_dir
+        self.static_dir = static_dir
+        self.template_path = template_path
+        self.basepath = basepath
+        self.parse_cache = parse_cache
+        self.pages = PageCache(self._render, max_pages)
+
+    def resolve(self, url_path):
+        # ('page' | 'static', file) or ('redirect', url), or None if nothing is served at url_path
+        if url_path + '/' == self.basepath:
+            return 'redirect', self.basepath
+        if not url_path.startswith(self.basepath):
+            return None
+        relative_path = url_path[len(self.basepath):]
+        if relative_path.startswith('/') or any(map(
+                lambda part: part in ('.', '..') or '\\' in part or '\0' in part, relative_path.split('/'))):
+            return None
+        if relative_path == '' or relative_path.endswith('/'):
+            source = os.path.join(self.content_dir, relative_path, 'index.md')
+            return ('page', source) if os.path.isfile(source) else None
+        if relative_path.endswith('.html'):
+            source = os.path.join(self.content_dir, relative_path[:-len('.html')] + '.md')
+            if os.path.isfile(source):
+                return 'page', source
+        if os.path.isdir(os.path.join(self.content_dir, relative_path)):
+            return 'redirect', url_path + '/'
+        static_path = os.path.join(self.static_dir, relative_path)
+        if os.path.isfile(static_path):
+            return 'static', static_path
+        if os.path.isdir(static_path):
+            return 'redirect', url_path + '/'
+        return None
+
+    def page(self, source):
+        # the page is as new as the latest of its source, the template and the template's partials
+        stat = os.stat(source)
+        template = load_template(self.template_path, self.basepath)
+        mtime = max([stat.st_mtime] + list(map(_mtime, (self.template_path,) + template.dependencies)))
+        return self.pages.get(source, (stat.st_mtime_ns, stat.st_size, template), mtime)
+
+    def _render(self, source):
+        with instrumentation.page(source):
+            document = read_document(source, self.parse_cache)
+            template = load_template(self.template_path, self.basepath)
+            return ''.join(render_document(document, template, self.basepath)).encode()
+
+    def make_server(self, host='127.0.0.1', port=8888):
+        set_image_sizes(read_image_sizes(self.static_dir))
+        handler = type('Handler', (_RequestHandler,), {'site': self})
+        return ThreadingHTTPServer((host, port), handler)
+
+    def serve_forever(self, host='127.0.0.1', port=8888):
+        server = self.make_server(host, port)
+        logger.info('Serving %s and %s on http://%s:%d%s', self.content_dir, self.static_dir, host,
+                    server.server_address[1], self.basepath)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return 0
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # headers and body go out in separate writes, which Nagle's algorithm would hold back on keep-alive connections
+    disable_nagle_algorithm = True
+    site = None
+
+    def do_GET(self):
+        self._respond(True)
+
+    def do_HEAD(self):
+        self._respond(False)
+
+    def log_message(self, format, *args):
+        logger.debug('%s %s', self.address_string(), format % args)
+
+    def _respond(self, send_body):
+        url_path = posixpath.normpath(unquote(urlsplit(self.path).path))
+        if self.path.split('?')[0].endswith('/') and url_path != '/':
+            url_path += '/'
+        target = self.site.resolve(url_path)
+        if target is None:
+            self._send_error(HTTPStatus.NOT_FOUND)
+            return
+        kind, path = target
+        if kind == 'redirect':
+            self.send_response(HTTPStatus.MOVED_PERMANENTLY)
+            self.send_header('Location', path)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        elif kind == 'page':
+            self._send_page(path, send_body)
+        else:
+            self._send_static(path, send_body)
+
+    def _send_page(self, source, send_body):
+        try:
+            page = self.site.page(source)
+        except Exception as e:
+            logger.warning('Failed to render %s: %s: %s', source, type(e).__name__, e)
+            self._send_error(HTTPStatus.INTERNAL_SERVER_ERROR)
+            return
+        if self._not_modified(page.etag, page.mtime):
+            return
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self._send_validators(page.etag, page.mtime, len(page.body))
+        if send_body:
+            self.wfile.write(page.body)
+
+    def _send_static(self, path, send_body):
+        with open(path, 'rb') as static_file:
+            stat = os.fstat(static_file.fileno())
+            etag = f'W/"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+            if self._not_modified(etag, stat.st_mtime):
+                return
+            self.send_response(HTTPStatus.OK)
+            self.send_header('Content-Type', mimetypes.guess_type(path)[0] or 'application/octet-stream')
+            self._send_validators(etag, stat.st_mtime, stat.st_size)
+            if send_body:
+                self.wfile.flush()
+                self.connection.sendfile(static_file)
+
+    def _not_modified(self, etag, mtime):
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            matches = if_none_match.strip() == '*' or etag.removeprefix('W/') in map(
+                lambda tag: tag.strip().removeprefix('W/'), if_none_match.split(','))
+        else:
+            matches = self._unmodified_since(mtime)
+        if matches:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', formatdate(mtime, usegmt=True))
+            self.end_headers()
+        return matches
+
+    def _unmodified_since(self, mtime):
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since is None:
+            return False
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+
+    def _send_validators(self, etag, mtime, length):
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', formatdate(mtime, usegmt=True))
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Content-Length', str(length))
+        self.end_headers()
+
+    def _send_error(self, status):
+        body = f'{status.value} {status.phrase}\n'.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
@@ -0,0 +1,115 @@
+import hashlib
+import json
+import logging
+import os
+
+from site_builder.assets import copy_file
+from site_builder.manifest import hash_file
+
+# Written to the root of every shard's output tree, and skipped when the trees are merged:
+#   {"version": 1, "shard": index, "count": count, "files": {output path: sha256}}
+SHARD_MANIFEST = '.shard.json'
+SHARD_MANIFEST_VERSION = 1
+# fixed cost added to every page's size, so many tiny pages still weigh something
+PAGE_OVERHEAD = 1024
+# a shard takes up to this much more than an equal share of the total size
+LOAD_FACTOR = 1.1
+
+logger = logging.getLogger(__name__)
+
+class ShardMergeError(Exception):
+    pass
+
+def parse_shard(text):
+    # 'INDEX/COUNT', e.g. '0/4' for the first of four shards
+    try:
+        index, count = map(int, text.split('/'))
+    except ValueError:
+        raise ValueError(f'shard must be INDEX/COUNT, got {text!r}')
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f'shard index must be in 0..{count - 1}, got {index}')
+    return index, count
+
+def assign_shards(weights, count):
+    # Bounded-load rendezvous hashing: every key ranks the shards by hash(shard, key) and, largest keys first,
+    # goes to the highest ranked shard that stays under LOAD_FACTOR times an equal share. Depends only on the
+    # keys and weights, so every node computes the same assignment, and a changed page mostly moves only itself.
+    capacity = max(sum(weights.values()) / count * LOAD_FACTOR, max(weights.values(), default=0))
+    loads = [0] * count
+    shards = {}
+    for key in sorted(weights, key=lambda key: (-weights[key], key)):
+        ranked = sorted(range(count), key=lambda shard: _rank(shard, key), reverse=True)
+        shard = next((shard for shard in ranked if loads[shard] + weights[key] <= capacity),
+                     min(ranked, key=lambda shard: loads[shard]))
+        loads[shard] += weights[key]
+        shards[key] = shard
+    return shards
+
+def select_shard(pages, dir_path_content, shard):
+    # the (source, dest) pages assigned to shard, an (index, count) pair
+    index, count = shard
+    keys = {source: os.path.relpath(source, dir_path_content).replace(os.sep, '/') for source, _ in pages}
+    shards = assign_shards({keys[source]: os.path.getsize(source) + PAGE_OVERHEAD for source, _ in pages}, count)
+    return [(source, dest) for source, dest in pages if shards[keys[source]] == index]
+
+def _rank(shard, key):
+    return hashlib.sha256(f'{shard}:{key}'.encode()).digest()[:8]
+
+def write_shard_manifest(dest_dir, shard):
+    os.makedirs(dest_dir, exist_ok=True)
+    files = {relative_path: hash_file(os.path.join(dest_dir, relative_path))
+             for relative_path in _output_files(dest_dir)}
+    with open(os.path.join(dest_dir, SHARD_MANIFEST), 'w') as manifest_file:
+        json.dump({'version': SHARD_MANIFEST_VERSION, 'shard': shard[0], 'count': shard[1], 'files': files},
+                  manifest_file, indent=1, sort_keys=True)
+    return files
+
+def load_shard_manifest(shard_dir):
+    path = os.path.join(shard_dir, SHARD_MANIFEST)
+    try:
+        with open(path, 'r') as manifest_file:
+            data = json.load(manifest_file)
+    except (OSError, ValueError) as e:
+        raise ShardMergeError(f'cannot read shard manifest {path}: {e}')
+    if not isinstance(data, dict) or data.get('version') != SHARD_MANIFEST_VERSION:
+        raise ShardMergeError(f'{path} is not a version {SHARD_MANIFEST_VERSION} shard manifest')
+    return data
+
+def merge_shards(shard_dirs, dest_dir, link_mode='copy'):
+    # Copies the partial output trees into dest_dir. Nothing is written unless the manifests come from one
+    # complete set of shards and no two shards wrote different content to the same path.
+    manifests = list(map(load_shard_manifest, shard_dirs))
+    counts = set(manifest['count'] for manifest in manifests)
+    if len(counts) != 1:
+        raise ShardMergeError(f'shards come from builds with different shard counts: {sorted(counts)}')
+    count = counts.pop()
+    indexes = sorted(manifest['shard'] for manifest in manifests)
+    if indexes != list(range(count)):
+        raise ShardMergeError(f'expected shards 0..{count - 1} once each, got {indexes}')
+
+    files = {}
+    conflicts = []
+    for shard_dir, manifest in zip(shard_dirs, manifests):
+        for relative_path, file_hash in manifest['files'].items():
+            previous = files.setdefault(relative_path, (shard_dir, file_hash))
+            if previous[1] != file_hash:
+                conflicts.append(f'{relative_path}: {previous[0]} and {shard_dir} differ')
+    if conflicts:
+        details = ''.join(map(lambda conflict: f'\n  {conflict}', conflicts))
+        raise ShardMergeError(f'{len(conflicts)} conflicting output(s):{details}')
+
+    for relative_path, (shard_dir, _) in files.items():
+        dest = os.path.join(dest_dir, relative_path)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        copy_file(os.path.join(shard_dir, relative_path), dest, link_mode)
+    logger.info('Merged %d shards into %s: %d files', count, dest_dir, len(files))
+    return files
+
+def _output_files(dest_dir):
+    outputs = []
+    for root, _, names in os.walk(dest_dir):
+        for name in names:
+            relative_path = os.path.relpath(os.path.join(root, name), dest_dir).replace(os.sep, '/')
+            if relative_path != SHARD_MANIFEST:
+                outputs.append(relative_path)
+    return sorted(outputs)
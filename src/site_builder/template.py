@@ -0,0 +1,105 @@
+import os
+import re
+
+_PLACEHOLDER = re.compile(r'\{\{\s*(?P<partial>>)?\s*(?P<name>[^\s{}]+)\s*\}\}')
+_URL_ATTRIBUTE = re.compile(r'\b(href|src)="/(?!/)')
+_MAX_PARTIAL_DEPTH = 16
+
+_compiled_templates = {}
+
+class TemplateError(Exception):
+    pass
+
+class Template:
+    # Compiled template: a tuple of (slot name, text) segments, the slot name is None for literal text.
+    def __init__(self, segments, dependencies=()):
+        self.segments = segments
+        self.dependencies = dependencies
+
+    @property
+    def slots(self):
+        return [name for name, _ in self.segments if name is not None]
+
+    def render(self, values):
+        for name, text in self.segments:
+            if name is None:
+                yield text
+                continue
+            value = values.get(name)
+            if value is None:
+                # unknown placeholders are left in the output untouched
+                yield text
+            elif isinstance(value, str):
+                yield value
+            elif callable(value):
+                yield from value()
+            else:
+                yield from value
+
+    def render_to_string(self, values):
+        return ''.join(self.render(values))
+
+    def write(self, fp, values):
+        fp.writelines(self.render(values))
+
+def compile_template(text, basepath=None, base_dir='.'):
+    dependencies = []
+    segments = _merge_literals(_compile_segments(text, basepath, base_dir, dependencies, 0))
+    return Template(tuple(segments), tuple(dependencies))
+
+def load_template(path, basepath=None):
+    key = (os.path.abspath(path), basepath)
+    cached = _compiled_templates.get(key)
+    if cached is not None and cached[0] == _stat_dependencies((path,) + cached[1].dependencies):
+        return cached[1]
+    with open(path, 'r') as template_file:
+        template = compile_template(template_file.read(), basepath, os.path.dirname(path))
+    _compiled_templates[key] = (_stat_dependencies((path,) + template.dependencies), template)
+    return template
+
+def clear_template_cache():
+    _compiled_templates.clear()
+
+def _compile_segments(text, basepath, base_dir, dependencies, depth):
+    if depth > _MAX_PARTIAL_DEPTH:
+        raise TemplateError(f'partials nested more than {_MAX_PARTIAL_DEPTH} levels deep')
+    position = 0
+    for match in _PLACEHOLDER.finditer(text):
+        yield None, _resolve_urls(text[position:match.start()], basepath)
+        if match.group('partial'):
+            partial_path = os.path.join(base_dir, match.group('name'))
+            try:
+                with open(partial_path, 'r') as partial_file:
+                    partial = partial_file.read()
+            except OSError as e:
+                raise TemplateError(f'cannot read partial {partial_path}: {e}')
+            dependencies.append(partial_path)
+            yield from _compile_segments(partial, basepath, os.path.dirname(partial_path), dependencies, depth + 1)
+        else:
+            yield match.group('name'), match.group(0)
+        position = match.end()
+    yield None, _resolve_urls(text[position:], basepath)
+
+def _merge_literals(segments):
+    merged = []
+    for name, text in segments:
+        if name is None and merged and merged[-1][0] is None:
+            merged[-1] = (None, merged[-1][1] + text)
+        elif name is not None or text != '':
+            merged.append((name, text))
+    return merged
+
+def _resolve_urls(html, basepath):
+    if basepath is None:
+        return html
+    return _URL_ATTRIBUTE.sub(lambda match: f'{match.group(1)}="{basepath}', html)
+
+def _stat_dependencies(paths):
+    stats = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            stats.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            stats.append(None)
+    return stats
@@ -0,0 +1,79 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+from fixtures import TempDirTestCase
+from site_builder.assets import sync_assets, copy_file
+
+
+class TestAssets(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.root, 'static')
+        self.dest = os.path.join(self.root, 'docs')
+        self.manifest = os.path.join(self.root, '.cache', 'asset_manifest.json')
+        self.write('static/index.css', 'body {}')
+        self.write('static/images/a.png', 'a' * 100)
+
+    def _sync(self, link_mode='copy'):
+        stats = sync_assets(self.static, self.dest, self.manifest, workers=2, link_mode=link_mode)
+        return stats.copied, stats.copied_bytes, stats.skipped, stats.removed
+
+    def test_sync_copies_then_skips(self):
+        self.assertEqual(self._sync(), (2, 107, 0, 0))
+        with open(os.path.join(self.dest, 'images', 'a.png')) as file:
+            self.assertEqual(file.read(), 'a' * 100)
+        self.assertEqual(self._sync(), (0, 0, 2, 0))
+
+    def test_sync_copies_changed_files(self):
+        self._sync()
+        self.write('static/index.css', 'body { color: red }')
+        self.assertEqual(self._sync(), (1, 19, 1, 0))
+
+    def test_sync_skips_touched_but_identical_files(self):
+        self._sync()
+        os.utime(os.path.join(self.static, 'index.css'), ns=(0, 0))
+        self.assertEqual(self._sync(), (0, 0, 2, 0))
+
+    def test_sync_restores_missing_output(self):
+        self._sync()
+        os.remove(os.path.join(self.dest, 'index.css'))
+        self.assertEqual(self._sync(), (1, 7, 1, 0))
+
+    def test_sync_removes_stale_outputs(self):
+        self._sync()
+        os.remove(os.path.join(self.static, 'images', 'a.png'))
+        self.assertEqual(self._sync(), (0, 0, 1, 1))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, 'images')))
+
+    def test_hardlink_mode(self):
+        self._sync('hardlink')
+        source = os.stat(os.path.join(self.static, 'index.css'))
+        dest = os.stat(os.path.join(self.dest, 'index.css'))
+        self.assertEqual(source.st_ino, dest.st_ino)
+
+    def test_copy_file_does_not_write_through_hardlinks(self):
+        source = os.path.join(self.static, 'index.css')
+        dest = os.path.join(self.root, 'linked.css')
+        os.link(source, dest)
+        other = os.path.join(self.root, 'other.css')
+        with open(other, 'w') as file:
+            file.write('other')
+        for link_mode in ('copy', 'reflink'):
+            copy_file(other, dest, link_mode)
+            with open(source) as file:
+                self.assertEqual(file.read(), 'body {}')
+            with open(dest) as file:
+                self.assertEqual(file.read(), 'other')
+
+    def test_reflink_without_fcntl_copies(self):
+        dest = os.path.join(self.root, 'copied.css')
+        with mock.patch.dict(sys.modules, {'fcntl': None}):
+            copy_file(os.path.join(self.static, 'index.css'), dest, 'reflink')
+        with open(dest) as file:
+            self.assertEqual(file.read(), 'body {}')
+
+
+if __name__ == '__main__':
+    unittest.main()
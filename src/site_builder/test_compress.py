@@ -0,0 +1,90 @@
+import gzip
+import os
+import shutil
+import unittest
+from unittest import mock
+
+from fixtures import TempDirTestCase, write_file
+from site_builder import compress
+from site_builder.compress import compress_outputs
+
+
+class TestCompress(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.dest = self.root + 'docs/'
+        self.manifest = self.root + '.cache/compress_manifest.json'
+        self.cache = self.root + '.cache/compressed'
+        self.page = '<p>' + 'the ring of power ' * 200 + '</p>'
+        write_file(self.dest + 'index.html', self.page)
+        write_file(self.dest + 'blog/post/index.html', self.page)
+        write_file(self.dest + 'index.css', 'body {}')
+        write_file(self.dest + 'random.js', os.urandom(4096).hex()[:2048])
+        write_file(self.dest + 'images/map.png', 'png ' * 1000)
+
+    def _compress(self, min_size=1024):
+        return compress_outputs(self.dest, self.manifest, self.cache, min_size=min_size,
+                                encodings=[('.gz', lambda data: gzip.compress(data, 9, mtime=0))])
+
+    def test_writes_gzip_next_to_outputs(self):
+        stats = self._compress()
+        with gzip.open(self.dest + 'blog/post/index.html.gz', 'rt') as file:
+            self.assertEqual(file.read(), self.page)
+        self.assertTrue(os.path.exists(self.dest + 'index.html.gz'))
+        self.assertFalse(os.path.exists(self.dest + 'index.css.gz'))
+        self.assertFalse(os.path.exists(self.dest + 'images/map.png.gz'))
+        self.assertEqual((stats.compressed, stats.uncompressed), (3, 1))
+
+    def test_skips_files_that_do_not_shrink(self):
+        write_file(self.dest + 'tiny.js', 'x')
+        self._compress(min_size=0)
+        self.assertFalse(os.path.exists(self.dest + 'tiny.js.gz'))
+        self.assertTrue(os.path.exists(self.dest + 'index.html.gz'))
+
+    def test_unchanged_outputs_are_not_recompressed(self):
+        self._compress()
+        os.utime(self.dest + 'index.html', ns=(1, 1))
+        write_file(self.dest + 'blog/post/index.html', self.page + '<p>changed</p>')
+        with mock.patch.object(compress.gzip, 'compress', wraps=gzip.compress) as gzip_compress:
+            stats = self._compress()
+        self.assertEqual(gzip_compress.call_count, 1)
+        self.assertEqual(stats.skipped, 3)
+
+    def test_missing_compressed_copy_is_restored(self):
+        self._compress()
+        os.remove(self.dest + 'index.html.gz')
+        self.assertEqual(self._compress().skipped, 4)
+        self.assertTrue(os.path.exists(self.dest + 'index.html.gz'))
+
+    def test_fresh_output_tree_is_filled_from_the_cache(self):
+        self._compress()
+        shutil.rmtree(self.dest)
+        write_file(self.dest + 'index.html', self.page)
+        write_file(self.dest + 'moved/index.html', self.page)
+        with mock.patch.object(compress.gzip, 'compress', wraps=gzip.compress) as gzip_compress:
+            stats = self._compress()
+        self.assertEqual(gzip_compress.call_count, 0)
+        self.assertEqual((stats.skipped, stats.compressed), (1, 1))
+        for relative_path in ('index.html.gz', 'moved/index.html.gz'):
+            with gzip.open(self.dest + relative_path, 'rt') as file:
+                self.assertEqual(file.read(), self.page)
+
+    def test_cached_copies_respect_min_size(self):
+        self._compress()
+        stats = self._compress(min_size=100000)
+        self.assertFalse(os.path.exists(self.dest + 'index.html.gz'))
+        self.assertEqual((stats.compressed, stats.uncompressed), (0, 4))
+
+    def test_removed_outputs_lose_their_compressed_copies(self):
+        self._compress()
+        os.remove(self.dest + 'blog/post/index.html')
+        self._compress()
+        self.assertFalse(os.path.exists(self.dest + 'blog/post/index.html.gz'))
+
+    def test_available_encodings_include_gzip(self):
+        suffixes = [suffix for suffix, _ in compress.available_encodings()]
+        self.assertEqual(suffixes[0], '.gz')
+
+
+if __name__ == '__main__':
+    unittest.main()
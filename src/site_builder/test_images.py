@@ -0,0 +1,80 @@
+import os
+import struct
+import unittest
+import zlib
+from unittest import mock
+
+from fixtures import TempDirTestCase, chunk, make_png
+from site_builder import images
+from site_builder.assets import sync_assets
+from site_builder.images import ImageOptimizer, optimize_png, png_size, read_chunks
+
+
+def pixels(data):
+    return zlib.decompress(b''.join(body for chunk_type, body in read_chunks(data) if chunk_type == b'IDAT'))
+
+
+class TestImages(TempDirTestCase):
+    def test_optimize_png_is_lossless_and_strips_metadata(self):
+        original = make_png(extra_chunks=(chunk(b'tEXt', b'Comment\x00' + b'x' * 500), chunk(b'tRNS', b'\x00\x01')))
+        optimized = optimize_png(original)
+        self.assertLess(len(optimized), len(original))
+        self.assertEqual(pixels(optimized), pixels(original))
+        self.assertEqual([chunk_type for chunk_type, _ in read_chunks(optimized)], [b'IHDR', b'tRNS', b'IDAT', b'IEND'])
+
+    def test_optimize_png_keeps_colour_chunks(self):
+        colour_chunks = (chunk(b'gAMA', struct.pack('>I', 45455)), chunk(b'sRGB', b'\x00'))
+        original = make_png(extra_chunks=colour_chunks + (chunk(b'tIME', b'\x07\xe8\x01\x01\x00\x00\x00'),))
+        optimized = optimize_png(original)
+        self.assertEqual(pixels(optimized), pixels(original))
+        self.assertEqual(list(read_chunks(optimized))[1:3], [(b'gAMA', struct.pack('>I', 45455)), (b'sRGB', b'\x00')])
+        self.assertNotIn(b'tIME', [chunk_type for chunk_type, _ in read_chunks(optimized)])
+
+    def test_animated_png_is_unchanged(self):
+        original = make_png(extra_chunks=(chunk(b'acTL', struct.pack('>II', 1, 0)),))
+        self.assertEqual(optimize_png(original), original)
+
+    def test_png_size(self):
+        self.assertEqual(png_size(make_png(17, 5)), (17, 5))
+        with self.assertRaises(ValueError):
+            png_size(b'GIF89a')
+
+    def test_invalid_png(self):
+        with self.assertRaises(ValueError):
+            list(read_chunks(make_png()[:60]))
+
+    def test_optimizer_caches_by_content(self):
+        self.write('a.png', make_png(level=1))
+        self.write('b.png', make_png(level=1))
+        optimizer = ImageOptimizer(self.root + 'cache')
+        with mock.patch.object(images, 'optimize_png', wraps=optimize_png) as optimize:
+            self.assertEqual(optimizer.write(self.root + 'a.png', self.root + 'a_out.png', 'hash'), (40, 30))
+            self.assertEqual(optimizer.write(self.root + 'b.png', self.root + 'b_out.png', 'hash'), (40, 30))
+        self.assertEqual(optimize.call_count, 1)
+
+    def test_not_a_png_is_copied(self):
+        self.write('fake.png', b'not a png')
+        optimizer = ImageOptimizer(self.root + 'cache')
+        self.assertIsNone(optimizer.write(self.root + 'fake.png', self.root + 'fake_out.png', 'hash'))
+        with open(self.root + 'fake_out.png', 'rb') as file:
+            self.assertEqual(file.read(), b'not a png')
+
+    def test_sync_assets_optimizes_and_records_sizes(self):
+        self.write('static/images/a.png', make_png(12, 8))
+        self.write('static/index.css', b'body {}')
+        optimizer = ImageOptimizer(self.root + '.cache/images')
+        manifest = self.root + '.cache/asset_manifest.json'
+        stats = sync_assets(self.root + 'static', self.root + 'docs', manifest, image_optimizer=optimizer)
+        self.assertEqual(stats.image_sizes, {'/images/a.png': (12, 8)})
+        self.assertLess(os.path.getsize(self.root + 'docs/images/a.png'),
+                        os.path.getsize(self.root + 'static/images/a.png'))
+
+        with mock.patch.object(optimizer, 'write') as write:
+            stats = sync_assets(self.root + 'static', self.root + 'docs', manifest, image_optimizer=optimizer)
+        write.assert_not_called()
+        self.assertEqual(stats.skipped, 2)
+        self.assertEqual(stats.image_sizes, {'/images/a.png': (12, 8)})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+from unittest import mock
+
+from fixtures import TempDirTestCase, write_file
+from markdown_converters import markdown_to_text_node
+from markdown_converters.block_memo import block_memo
+from markdown_converters.document import Document
+from site_builder.link_graph import build_link_graph, prefetch_hints
+from site_builder.pages import generate_pages_recursive
+
+
+class TestLinkGraph(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = self.root + 'content/'
+        self.static = self.root + 'static/'
+        self.dest = self.root + 'docs/'
+        write_file(self.static + 'images/map.png', 'png')
+        write_file(self.content + 'index.md',
+                    '# Home\n\n[blog](/blog) [post](/blog/post/) [about](about.html) [gone](/gone)\n\n'
+                    '![map](/images/map.png) ![lost](/images/lost.png) [ext](https://example.com) [top](#top)')
+        write_file(self.content + 'about.md', '# About\n\n[home](/) [post](blog/post/index.html)')
+        write_file(self.content + 'blog/index.md', '# Blog\n\n[post](post) [up](../missing)')
+        write_file(self.content + 'blog/post/index.md', '# Post\n\n[self](/blog/post)')
+        write_file(self.content + 'draft.md', '# Draft\n\n[blog](/blog/)')
+
+    def _graph(self):
+        # every build of this site warns about its broken links; they are kept in self.warnings
+        with self.assertLogs('site_builder.link_graph', 'WARNING') as logs:
+            graph = build_link_graph(self.content, self.dest, self.static)
+        self.warnings = logs.output
+        return graph
+
+    def test_broken_links(self):
+        self.assertEqual(self._graph().broken, [
+            (self.content + 'blog/index.md', '../missing'),
+            (self.content + 'index.md', '/images/lost.png'),
+            (self.content + 'index.md', '/gone'),
+        ])
+        self.assertEqual(self.warnings, [
+            f'WARNING:site_builder.link_graph:Broken link in {self.content}blog/index.md: ../missing',
+            f'WARNING:site_builder.link_graph:Broken link in {self.content}index.md: /images/lost.png',
+            f'WARNING:site_builder.link_graph:Broken link in {self.content}index.md: /gone',
+        ])
+
+    def test_orphans(self):
+        self.assertEqual(self._graph().orphans(), ['/draft.html'])
+
+    def test_links_are_resolved_to_pages(self):
+        graph = self._graph()
+        self.assertEqual(graph.links['/'], ['/blog/', '/blog/post/', '/about.html'])
+        self.assertEqual(graph.links['/blog/'], ['/blog/post/'])
+        self.assertEqual(graph.inbound()['/blog/post/'], 3)
+
+    def test_prefetch_hints(self):
+        hints = prefetch_hints(self._graph(), '/site/', 2)
+        self.assertEqual(hints, '<link rel="prefetch" href="/site/blog/post/">'
+                                '<link rel="prefetch" href="/site/blog/">')
+
+    def test_links_and_images_come_from_the_page_parse(self):
+        with mock.patch.object(markdown_to_text_node, '_InlineScanner', wraps=markdown_to_text_node._InlineScanner) \
+                as scanner:
+            block_memo.clear()
+            for name in ('index.md', 'about.md', 'blog/index.md', 'blog/post/index.md', 'draft.md'):
+                with open(self.content + name) as file:
+                    Document(file.read()).blocks
+            parses = scanner.call_count
+            scanner.reset_mock()
+            block_memo.clear()
+            self._graph()
+        self.assertEqual(scanner.call_count, parses)
+
+    def test_prefetch_value_in_template(self):
+        self.write('template.html', '<head>{{ Prefetch }}</head>{{ Content }}')
+        hints = prefetch_hints(self._graph(), '/', 1)
+        generate_pages_recursive(self.content, self.root + 'template.html', self.dest, '/',
+                                 extra_values={'Prefetch': hints})
+        with open(self.dest + 'about.html') as file:
+            self.assertTrue(file.read().startswith('<head><link rel="prefetch" href="/blog/post/"></head>'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import unittest
+from unittest import mock
+
+from fixtures import TempDirTestCase, write_file
+from site_builder import pages
+from site_builder.pages import discover_pages, generate_pages_incremental, generate_pages_recursive, \
+    remove_stale_pages, PageGenerationError
+
+
+class TestPages(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = self.root + 'content/'
+        self.dest = self.root + 'docs/'
+        self.template = self.root + 'template.html'
+        self.manifest = self.root + '.cache/build_manifest.json'
+        write_file(self.template, '<title>{{ Title }}</title><a href="/x">{{ Content }}</a>')
+        write_file(self.content + 'index.md', '# Home\n\nhello')
+        write_file(self.content + 'blog/post/index.md', '# Post\n\nworld')
+
+    def _build(self, basepath='/'):
+        return generate_pages_incremental(self.content, self.template, self.dest, basepath, self.manifest)
+
+    def test_discover_pages(self):
+        self.assertEqual(discover_pages(self.content, self.dest), [
+            (self.content + 'blog/post/index.md', self.dest + 'blog/post/index.html'),
+            (self.content + 'index.md', self.dest + 'index.html'),
+        ])
+
+    def test_remove_stale_pages(self):
+        generate_pages_recursive(self.content, self.template, self.dest, '/')
+        self.write('static/about.html', 'static page')
+        write_file(self.dest + 'about.html', 'static page')
+        write_file(self.dest + 'blog/post/index.html.gz', 'compressed')
+        os.remove(self.content + 'blog/post/index.md')
+        self.assertEqual(remove_stale_pages(self.content, self.root + 'static', self.dest), 1)
+        self.assertEqual(sorted(os.listdir(self.dest)), ['about.html', 'blog', 'index.html'])
+        self.assertEqual(os.listdir(self.dest + 'blog/post'), ['index.html.gz'])
+
+    def test_incremental_skips_unchanged_pages(self):
+        self.assertEqual(self._build(), (2, 0))
+        self.assertEqual(self._build(), (0, 0))
+
+        write_file(self.content + 'index.md', '# Home\n\nchanged')
+        self.assertEqual(self._build(), (1, 0))
+        with open(self.dest + 'index.html') as file:
+            self.assertIn('changed', file.read())
+
+    def test_incremental_rebuilds_on_template_and_basepath_change(self):
+        self._build()
+        write_file(self.template, '<h1>{{ Title }}</h1>{{ Content }}')
+        self.assertEqual(self._build(), (2, 0))
+        self.assertEqual(self._build('/base/'), (2, 0))
+
+    def test_incremental_removes_outputs_of_deleted_sources(self):
+        self._build()
+        os.remove(self.content + 'blog/post/index.md')
+        self.assertEqual(self._build(), (0, 1))
+        self.assertFalse(os.path.exists(self.dest + 'blog'))
+        self.assertTrue(os.path.exists(self.dest + 'index.html'))
+
+    def test_incremental_regenerates_missing_outputs(self):
+        self._build()
+        os.remove(self.dest + 'index.html')
+        self.assertEqual(self._build(), (1, 0))
+
+    def _read_outputs(self):
+        outputs = {}
+        for root, _, files in os.walk(self.dest):
+            for name in files:
+                with open(os.path.join(root, name)) as file:
+                    outputs[os.path.relpath(os.path.join(root, name), self.dest)] = file.read()
+        return outputs
+
+    def test_parallel_matches_sequential(self):
+        for i in range(6):
+            write_file(self.content + f'page{i}/index.md', f'# Page {i}\n\n' + 'text ' * (i * 100))
+        generate_pages_recursive(self.content, self.template, self.dest, '/')
+        sequential = self._read_outputs()
+
+        with self.assertLogs('site_builder.pages', level='DEBUG') as log:
+            generate_pages_recursive(self.content, self.template, self.dest, '/', workers=3)
+        self.assertEqual(self._read_outputs(), sequential)
+        logged_sources = [line.split(' ')[3] for line in log.output]
+        self.assertEqual(logged_sources, [source for source, _ in discover_pages(self.content, self.dest)])
+
+    def test_parallel_collects_all_failures(self):
+        write_file(self.content + 'broken1.md', 'no title')
+        write_file(self.content + 'broken2.md', 'no title either')
+        with self.assertRaises(PageGenerationError) as context:
+            generate_pages_recursive(self.content, self.template, self.dest, '/', workers=2)
+        self.assertEqual(list(map(lambda failure: failure[0], context.exception.failures)),
+                         [self.content + 'broken1.md', self.content + 'broken2.md'])
+        self.assertTrue(os.path.exists(self.dest + 'blog/post/index.html'))
+
+    def test_large_sources_are_streamed(self):
+        write_file(self.content + 'big/index.md', '\n\n'.join(
+            ['Intro [link](/intro)', '# Big', '```\ncode\n\nmore code\n```'] + [f'* item **{i}**' for i in range(50)]))
+        generate_pages_recursive(self.content, self.template, self.dest, '/blog/')
+        in_memory = self._read_outputs()
+
+        with mock.patch.object(pages, 'STREAMING_THRESHOLD', 0), \
+                mock.patch.object(pages, 'load_document', side_effect=AssertionError('loaded whole file')):
+            generate_pages_recursive(self.content, self.template, self.dest, '/blog/')
+        self.assertEqual(self._read_outputs(), in_memory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import marshal
+import os
+import threading
+import unittest
+from unittest import mock
+
+from fixtures import TempDirTestCase
+from markdown_converters.markdown_to_blocks import markdown_to_text_blocks
+from site_builder import parse_cache
+from site_builder.manifest import hash_bytes
+from site_builder.pages import load_document
+from site_builder.parse_cache import ParseCache, encode_blocks, decode_blocks
+
+MARKDOWN = """# Title
+
+Some **bold**, _italic_, `code`, [a link](/x) and ![an image](/y.png).
+
+* first
+* second [link](/z)
+
+1. one
+2. two
+
+> quoted
+> lines
+
+```
+code block
+```"""
+
+
+class TestParseCache(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = self.root + 'parse'
+
+    def test_encode_decode_roundtrip(self):
+        blocks = markdown_to_text_blocks(MARKDOWN)
+        self.assertEqual(decode_blocks(encode_blocks(blocks)), blocks)
+
+    def test_get_and_put(self):
+        cache = ParseCache(self.directory)
+        blocks = markdown_to_text_blocks(MARKDOWN)
+        self.assertIsNone(cache.get('abc'))
+        cache.put('abc', blocks)
+        self.assertEqual(cache.get('abc'), blocks)
+        self.assertEqual(ParseCache(self.directory).get('abc'), blocks)
+
+    def test_concurrent_puts_of_the_same_source(self):
+        cache = ParseCache(self.directory)
+        blocks = markdown_to_text_blocks(MARKDOWN)
+        both_writing = threading.Barrier(2, timeout=5)
+        errors = []
+        marshal_dump = marshal.dump
+
+        def dump(value, file):
+            both_writing.wait()
+            marshal_dump(value, file)
+
+        def put():
+            try:
+                cache.put('abc', blocks)
+            except Exception as e:
+                errors.append(e)
+
+        with mock.patch.object(parse_cache.marshal, 'dump', dump):
+            threads = [threading.Thread(target=put) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(cache.get('abc'), blocks)
+
+    def test_parser_change_invalidates_entries(self):
+        cache = ParseCache(self.directory)
+        cache.put('abc', markdown_to_text_blocks(MARKDOWN))
+        with mock.patch.object(parse_cache, '_parser_version', 'other-version'):
+            self.assertIsNone(cache.get('abc'))
+
+    def test_corrupt_entry_is_a_miss(self):
+        cache = ParseCache(self.directory)
+        cache.put('abc', markdown_to_text_blocks(MARKDOWN))
+        with open(cache._path('abc'), 'wb') as file:
+            file.write(b'not marshal data')
+        self.assertIsNone(cache.get('abc'))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        blocks = markdown_to_text_blocks(MARKDOWN)
+        cache = ParseCache(self.directory)
+        cache.put('a', blocks)
+        entry_size = os.path.getsize(cache._path('a'))
+        cache = ParseCache(self.directory, max_bytes=entry_size * 3)
+        for key, mtime in (('a', 1), ('b', 2), ('c', 3)):
+            cache.put(key, blocks)
+            os.utime(cache._path(key), ns=(mtime * 10 ** 9, mtime * 10 ** 9))
+        self.assertIsNotNone(cache.get('a'))
+        cache.put('d', blocks)
+
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('d'))
+        self.assertLessEqual(cache._directory_size(), entry_size * 3)
+
+    def test_load_document_uses_cache(self):
+        cache = ParseCache(self.directory)
+        first = load_document(MARKDOWN, cache)
+        self.assertIsNotNone(cache.get(hash_bytes(MARKDOWN.encode())))
+        with mock.patch('markdown_converters.document.text_blocks_from_lines') as parse:
+            second = load_document(MARKDOWN, cache)
+            self.assertEqual(second.blocks, first.blocks)
+            self.assertEqual(second.html_node.to_html(), first.html_node.to_html())
+            parse.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import json
+import os
+import unittest
+from unittest import mock
+
+import main
+from fixtures import TempDirTestCase, read_file, restore_global_state
+from site_builder import publish as publish_module
+from site_builder.manifest import open_output
+from site_builder.publish import publish, stage, staging_dir
+
+
+class TestPublish(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        restore_global_state(self)
+        self.dest = self.root + 'docs/'
+        self.cache = self.root + '.cache/publish'
+
+    def _build(self, files):
+        staging = stage(self.dest, seed=False)
+        for relative_path, text in files.items():
+            path = os.path.join(staging, relative_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open_output(path) as file:
+                file.write(text)
+        return publish(staging, self.dest, self.cache)
+
+    def _read(self, relative_path):
+        return read_file(self.dest + relative_path)
+
+    def _diff(self):
+        with open(self.cache + '/diff.json') as file:
+            return json.load(file)
+
+    def test_first_publish(self):
+        self._build({'index.html': 'home', 'blog/post.html': 'post'})
+        self.assertEqual(self._read('blog/post.html'), 'post')
+        self.assertFalse(os.path.exists(staging_dir(self.dest)))
+        self.assertEqual(self._diff(), {'added': ['blog/post.html', 'index.html'], 'changed': [], 'removed': []})
+        with open(self.cache + '/manifest.json') as file:
+            entry = json.load(file)['files']['index.html']
+        self.assertEqual((entry['size'], len(entry['hash'])), (4, 64))
+
+    def test_diff_against_previous_publish(self):
+        self._build({'index.html': 'home', 'old.html': 'old', 'same.html': 'same'})
+        stats = self._build({'index.html': 'new home', 'new.html': 'new', 'same.html': 'same'})
+        self.assertEqual(self._diff(), {'added': ['new.html'], 'changed': ['index.html'], 'removed': ['old.html']})
+        self.assertEqual(stats.preserved, 1)
+        self.assertFalse(os.path.exists(self.dest + 'old.html'))
+
+    def test_unchanged_files_keep_their_mtime(self):
+        self._build({'index.html': 'home'})
+        os.utime(self.dest + 'index.html', ns=(1_000_000_000, 1_000_000_000))
+        before = os.stat(self.dest + 'index.html')
+        self._build({'index.html': 'home'})
+        after = os.stat(self.dest + 'index.html')
+        self.assertEqual((after.st_mtime_ns, after.st_ino), (before.st_mtime_ns, before.st_ino))
+
+    def test_seeded_build_does_not_write_through_links(self):
+        self._build({'index.html': 'home', 'post.html': 'post'})
+        staging = stage(self.dest)
+        self.assertTrue(os.path.samefile(staging + 'post.html', self.dest + 'post.html'))
+        with open_output(staging + 'index.html') as file:
+            file.write('changed')
+        self.assertEqual(self._read('index.html'), 'home')
+        publish(staging, self.dest, self.cache)
+        self.assertEqual(self._read('index.html'), 'changed')
+        self.assertEqual(self._diff(), {'added': [], 'changed': ['index.html'], 'removed': []})
+
+    def test_swap_without_rename_exchange(self):
+        self._build({'index.html': 'home'})
+        with mock.patch.object(publish_module, '_exchange', return_value=False):
+            self._build({'index.html': 'new'})
+        self.assertEqual(self._read('index.html'), 'new')
+        self.assertEqual(sorted(os.listdir(self.root)), ['.cache', 'docs'])
+
+    def test_swap_on_windows(self):
+        self._build({'index.html': 'home'})
+        with mock.patch.object(publish_module.sys, 'platform', 'win32'):
+            self._build({'index.html': 'new'})
+        self.assertEqual(self._read('index.html'), 'new')
+
+    def test_unchanged_build_skips_assets_and_keeps_outputs(self):
+        self.write_site({'index.md': '# Home\n\n' + 'words ' * 300, 'blog/post.md': '# Post'},
+                        {'index.css': 'body {}', 'images/a.txt': 'a'})
+        args = ['--content', self.root + 'content', '--static', self.root + 'static', '--template',
+                self.root + 'template.html', '--output', self.dest, '--cache-dir', self.root + '.cache']
+        main.main(['-q'] + args)
+        before = {path: os.stat(self.dest + path).st_ino for path in ('index.css', 'images/a.txt', 'index.html.gz')}
+
+        with self.assertLogs('site_builder', 'INFO') as logs:
+            main.main(['-q'] + args)
+        self.assertIn('INFO:site_builder.assets:Copied 0 assets (0 bytes), skipped 2 unchanged, removed 0 stale',
+                      logs.output)
+        self.assertIn('INFO:site_builder.compress:Compressed 0 outputs (saving 0 bytes), left 0 too small or '
+                      'incompressible, skipped 7 unchanged', logs.output)
+        self.assertEqual({path: os.stat(self.dest + path).st_ino for path in before}, before)
+        self.assertEqual(self._diff(), {'added': [], 'changed': [], 'removed': []})
+
+        os.remove(self.root + 'content/blog/post.md')
+        main.main(['-q'] + args)
+        self.assertFalse(os.path.exists(self.dest + 'blog'))
+        self.assertIn('blog/post.html', self._diff()['removed'])
+
+    def test_failed_build_keeps_published_site(self):
+        self._build({'index.html': 'home'})
+        self.write('template.html', '{{ Content }}')
+        os.makedirs(self.root + 'static')
+        with self.assertRaises(FileNotFoundError):
+            main.main(['-q', '--content', self.root + 'missing', '--static', self.root + 'static', '--template',
+                       self.root + 'template.html', '--output', self.dest, '--cache-dir', self.root + '.cache'])
+        self.assertEqual(self._read('index.html'), 'home')
+
+
+if __name__ == '__main__':
+    unittest.main()
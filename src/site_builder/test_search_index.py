@@ -0,0 +1,89 @@
+import json
+import os
+import unittest
+from unittest import mock
+
+from fixtures import TempDirTestCase, write_file
+from markdown_converters.document import Document
+from site_builder import search_index
+from site_builder.pages import page_url
+from site_builder.search_index import build_search_index, page_terms, tokenize
+
+
+class TestSearchIndex(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = self.root + 'content/'
+        self.dest = self.root + 'docs/'
+        self.manifest = self.root + '.cache/search_index.json'
+        write_file(self.content + 'index.md', '# Home\n\nWelcome to the **Shire**, hobbits.')
+        write_file(self.content + 'blog/post/index.md', '# Rings\n\nOne ring to rule them all.\n\n* shire\n* ring')
+
+    def _build(self, max_shard_bytes=32 * 1024, basepath='/'):
+        return build_search_index(self.content, self.dest, basepath, self.manifest, max_shard_bytes=max_shard_bytes)
+
+    def _search(self, term):
+        with open(self.dest + 'search/index.json') as file:
+            index = json.load(file)
+        prefixes = [prefix for prefix in index['shards'] if term.startswith(prefix)]
+        if not prefixes:
+            return {}
+        with open(self.dest + 'search/' + index['shards'][max(prefixes, key=len)]) as file:
+            postings = json.load(file).get(term, [])
+        return {index['pages'][postings[i]][0]: postings[i + 1] for i in range(0, len(postings), 2)}
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize('One **Ring**, to rule-them a1l!'), ['one', 'ring', 'to', 'rule', 'them', 'a1l'])
+
+    def test_page_terms_weight_headings(self):
+        terms = page_terms(Document('# Ring\n\nthe ring and a `ring` [link](/ring)'))
+        self.assertEqual(terms['ring'], 3 + 2)
+        self.assertEqual(terms['link'], 1)
+        self.assertNotIn('a', terms)
+
+    def test_page_url(self):
+        self.assertEqual(page_url(self.dest + 'index.html', self.dest, '/base/'), '/base/')
+        self.assertEqual(page_url(self.dest + 'blog/post/index.html', self.dest, '/'), '/blog/post/')
+        self.assertEqual(page_url(self.dest + 'about.html', self.dest, '/'), '/about.html')
+
+    def test_search(self):
+        self._build()
+        self.assertEqual(self._search('shire'), {'/': 1, '/blog/post/': 1})
+        self.assertEqual(self._search('ring'), {'/blog/post/': 2})
+        self.assertEqual(self._search('mordor'), {})
+
+    def test_large_shards_are_split(self):
+        write_file(self.content + 'words.md', '# Words\n\n' + ' '.join(f'ring{i}' for i in range(200)))
+        self._build(max_shard_bytes=256)
+        shards = os.listdir(self.dest + 'search')
+        self.assertGreater(len(shards), 10)
+        for shard in shards:
+            self.assertLess(os.path.getsize(self.dest + 'search/' + shard), 1024)
+        self.assertEqual(self._search('ring17'), {'/words.html': 1})
+        self.assertEqual(self._search('ring'), {'/blog/post/': 2})
+
+    def test_edit_only_retokenizes_changed_page(self):
+        self._build()
+        write_file(self.content + 'index.md', '# Home\n\nWelcome to Mordor.')
+        with mock.patch.object(search_index, 'page_terms', wraps=search_index.page_terms) as terms:
+            self._build()
+        self.assertEqual(terms.call_count, 1)
+        self.assertEqual(self._search('shire'), {'/blog/post/': 1})
+        self.assertEqual(self._search('mordor'), {'/': 1})
+
+    def test_removed_pages_and_shards(self):
+        self._build()
+        os.remove(self.content + 'blog/post/index.md')
+        self._build()
+        self.assertEqual(self._search('shire'), {'/': 1})
+        self.assertEqual(self._search('ring'), {})
+        self.assertNotIn('72.json', os.listdir(self.dest + 'search'))
+
+    def test_basepath_change_updates_urls(self):
+        self._build()
+        self._build(basepath='/site/')
+        self.assertEqual(self._search('hobbits'), {'/site/': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import http.client
+import os
+import threading
+import time
+import unittest
+
+from fixtures import TempDirTestCase
+from site_builder.serve import SiteServer
+
+
+class TestSiteServer(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write_site({'index.md': '# Home\n\n[post](/blog/post/)', 'blog/post/index.md': '# Post\n\ntext',
+                         'about.md': '# About'}, {'index.css': 'body {}'})
+        self.site = SiteServer(self.root + 'content/', self.root + 'static/', self.root + 'template.html')
+        self.server = self.site.make_server(port=0)
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.01,))
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def _get(self, path, headers=None, method='GET'):
+        connection = http.client.HTTPConnection('127.0.0.1', self.server.server_address[1])
+        try:
+            connection.request(method, path, headers=headers or {})
+            response = connection.getresponse()
+            return response.status, dict(response.getheaders()), response.read()
+        finally:
+            connection.close()
+
+    def test_renders_pages_on_request(self):
+        status, headers, body = self._get('/blog/post/')
+        self.assertEqual(status, 200)
+        self.assertEqual(headers['Content-Type'], 'text/html; charset=utf-8')
+        self.assertEqual(body, b'<title>Post</title><div><h1>Post</h1><p>text</p></div>')
+        self.assertEqual(self._get('/')[0], 200)
+        self.assertIn(b'<h1>About</h1>', self._get('/about.html')[2])
+
+    def test_caches_rendered_pages(self):
+        self._get('/blog/post/')
+        self._get('/blog/post/')
+        self.assertEqual(self.site.pages.renders, 1)
+
+    def test_not_modified(self):
+        _, headers, _ = self._get('/blog/post/')
+        status, _, body = self._get('/blog/post/', {'If-None-Match': headers['ETag']})
+        self.assertEqual((status, body), (304, b''))
+        status, _, _ = self._get('/blog/post/', {'If-Modified-Since': headers['Last-Modified']})
+        self.assertEqual(status, 304)
+        status, _, _ = self._get('/blog/post/', {'If-None-Match': '"other"'})
+        self.assertEqual(status, 200)
+
+    def test_edit_invalidates_page(self):
+        _, headers, _ = self._get('/blog/post/')
+        self.write('content/blog/post/index.md', '# Post\n\nchanged', touch=True)
+        status, _, body = self._get('/blog/post/', {'If-None-Match': headers['ETag']})
+        self.assertEqual(status, 200)
+        self.assertIn(b'changed', body)
+
+    def test_template_change_rerenders(self):
+        self._get('/blog/post/')
+        self.write('template.html', '<h2>{{ Title }}</h2>', touch=True)
+        self.assertEqual(self._get('/blog/post/')[2], b'<h2>Post</h2>')
+
+    def test_template_change_is_modified_since(self):
+        _, headers, _ = self._get('/blog/post/')
+        self.write('template.html', '<h2>{{ Title }}</h2>')
+        mtime = os.stat(self.root + 'content/blog/post/index.md').st_mtime + 10
+        os.utime(self.root + 'template.html', (mtime, mtime))
+        status, headers, body = self._get('/blog/post/', {'If-Modified-Since': headers['Last-Modified']})
+        self.assertEqual((status, body), (200, b'<h2>Post</h2>'))
+        self.assertEqual(self._get('/blog/post/', {'If-Modified-Since': headers['Last-Modified']})[0], 304)
+
+    def test_concurrent_requests_render_once(self):
+        render = self.site.pages.render
+        def slow_render(source):
+            time.sleep(0.2)
+            return render(source)
+        self.site.pages.render = slow_render
+        responses = []
+        threads = [threading.Thread(target=lambda: responses.append(self._get('/blog/post/'))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(list(map(lambda response: response[0], responses)), [200] * 8)
+        self.assertEqual(self.site.pages.renders, 1)
+
+    def test_evicts_least_recently_used(self):
+        self.site.pages.max_pages = 1
+        self._get('/')
+        self._get('/about.html')
+        self._get('/')
+        self.assertEqual(self.site.pages.renders, 3)
+        self.assertEqual(len(self.site.pages), 1)
+
+    def test_serves_static_files(self):
+        status, headers, body = self._get('/index.css')
+        self.assertEqual((status, body), (200, b'body {}'))
+        self.assertEqual(headers['Content-Type'], 'text/css')
+        self.assertEqual(self._get('/index.css', {'If-None-Match': headers['ETag']})[0], 304)
+
+    def test_head(self):
+        status, headers, body = self._get('/index.css', method='HEAD')
+        self.assertEqual((status, headers['Content-Length'], body), (200, '7', b''))
+
+    def test_redirects_directories(self):
+        status, headers, _ = self._get('/blog/post')
+        self.assertEqual((status, headers['Location']), (301, '/blog/post/'))
+
+    def test_not_found(self):
+        self.assertEqual(self._get('/missing/')[0], 404)
+        self.assertEqual(self._get('/blog/')[0], 404)
+        self.assertEqual(self._get('/../template.html')[0], 404)
+        self.assertEqual(self._get('//etc/passwd')[0], 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
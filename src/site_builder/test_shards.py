@@ -0,0 +1,111 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+from fixtures import TempDirTestCase, read_tree
+from site_builder.shards import (SHARD_MANIFEST, ShardMergeError, assign_shards, merge_shards, parse_shard,
+                                 write_shard_manifest)
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestAssignShards(unittest.TestCase):
+    def setUp(self):
+        self.weights = {f'section{i % 7}/page{i}/index.md': 1000 + (i * 7919) % 20000 for i in range(500)}
+
+    def test_deterministic(self):
+        self.assertEqual(assign_shards(self.weights, 4), assign_shards(dict(reversed(self.weights.items())), 4))
+
+    def test_balanced_by_weight(self):
+        shards = assign_shards(self.weights, 4)
+        loads = [0] * 4
+        for key, shard in shards.items():
+            loads[shard] += self.weights[key]
+        self.assertLessEqual(max(loads), sum(loads) / 4 * 1.1)
+
+    def test_adding_a_page_moves_few_pages(self):
+        before = assign_shards(self.weights, 4)
+        after = assign_shards(dict(self.weights, **{'new/index.md': 5000}), 4)
+        moved = sum(1 for key in before if before[key] != after[key])
+        self.assertLess(moved, len(before) // 10)
+
+    def test_single_shard(self):
+        self.assertEqual(set(assign_shards(self.weights, 1).values()), {0})
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard('2/4'), (2, 4))
+        for text in ('4/4', '-1/4', '0/0', '1', 'a/b'):
+            with self.assertRaises(ValueError):
+                parse_shard(text)
+
+
+class TestMergeShards(TempDirTestCase):
+    def _shard(self, index, count, files):
+        for relative_path, text in files.items():
+            self.write(f'shard{index}/{relative_path}', text)
+        write_shard_manifest(f'{self.root}shard{index}', (index, count))
+        return f'{self.root}shard{index}'
+
+    def test_merges_and_deduplicates(self):
+        dirs = [self._shard(0, 2, {'a.html': 'a', 'index.css': 'css'}),
+                self._shard(1, 2, {'b/index.html': 'b', 'index.css': 'css'})]
+        files = merge_shards(dirs, self.root + 'docs')
+        self.assertEqual(sorted(files), ['a.html', 'b/index.html', 'index.css'])
+        self.assertEqual(self.read('docs/b/index.html'), 'b')
+        self.assertFalse(os.path.exists(self.root + 'docs/' + SHARD_MANIFEST))
+
+    def test_conflicting_outputs(self):
+        dirs = [self._shard(0, 2, {'a.html': 'one'}), self._shard(1, 2, {'a.html': 'two'})]
+        with self.assertRaisesRegex(ShardMergeError, 'a.html'):
+            merge_shards(dirs, self.root + 'docs')
+        self.assertFalse(os.path.exists(self.root + 'docs'))
+
+    def test_missing_and_mismatched_shards(self):
+        first = self._shard(0, 3, {'a.html': 'a'})
+        second = self._shard(1, 3, {'b.html': 'b'})
+        with self.assertRaisesRegex(ShardMergeError, 'expected shards'):
+            merge_shards([first, second], self.root + 'docs')
+        with self.assertRaisesRegex(ShardMergeError, 'different shard counts'):
+            merge_shards([first, self._shard(2, 4, {})], self.root + 'docs')
+        with self.assertRaisesRegex(ShardMergeError, 'cannot read'):
+            merge_shards([self.root + 'missing'], self.root + 'docs')
+
+
+class TestShardedBuild(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        pages = {'index.md': '# Home\n\n[post](/blog/post0/)'}
+        pages.update((f'blog/post{i}/index.md', f'# Post {i}\n\n' + 'text ' * (i * 50)) for i in range(40))
+        self.write_site(pages, {'index.css': 'body {}'})
+
+    def _main(self, *args):
+        return subprocess.Popen([sys.executable, os.path.join(SRC_DIR, 'main.py'), '-q', *args], cwd=self.root,
+                                env=dict(os.environ, PYTHONPATH=SRC_DIR), stderr=subprocess.PIPE, text=True)
+
+    def _wait(self, process):
+        _, stderr = process.communicate()
+        self.assertEqual(process.returncode, 0, stderr)
+
+    def test_merged_shards_match_single_build(self):
+        count = 3
+        processes = [self._main('--shard', f'{i}/{count}', '-o', f'shard{i}', '--cache-dir', f'.cache{i}')
+                     for i in range(count)]
+        processes.append(self._main('-o', 'single', '--cache-dir', '.cache-single', '--no-compress'))
+        for process in processes:
+            self._wait(process)
+
+        pages = []
+        for i in range(count):
+            files = json.loads(self.read(f'shard{i}/{SHARD_MANIFEST}'))['files']
+            pages.append(set(path for path in files if path.endswith('.html')))
+        self.assertEqual(sum(map(len, pages)), 41)
+        self.assertTrue(all(pages))
+
+        self._wait(self._main('--merge', *(f'shard{i}' for i in range(count)), '-o', 'docs', '--no-compress'))
+        self.assertEqual(read_tree(self.root + 'docs'), read_tree(self.root + 'single'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+
+from site_builder.template import compile_template, load_template, TemplateError
+
+
+class TestTemplate(unittest.TestCase):
+    def test_compile_segments(self):
+        template = compile_template('<title>{{ Title }}</title><main>{{Content}}</main>')
+        self.assertEqual(template.segments, (
+            (None, '<title>'),
+            ('Title', '{{ Title }}'),
+            (None, '</title><main>'),
+            ('Content', '{{Content}}'),
+            (None, '</main>'),
+        ))
+        self.assertEqual(template.slots, ['Title', 'Content'])
+
+    def test_render(self):
+        template = compile_template('<h1>{{ Title }}</h1>{{ Content }}{{ Content }}')
+        html = template.render_to_string({'Title': 'Home', 'Content': lambda: iter(['<p>', 'x', '</p>'])})
+        self.assertEqual(html, '<h1>Home</h1><p>x</p><p>x</p>')
+
+    def test_unknown_placeholders_are_kept(self):
+        template = compile_template('{{ Title }} {{ Missing }}')
+        self.assertEqual(template.render_to_string({'Title': 'Home'}), 'Home {{ Missing }}')
+
+    def test_basepath_only_applies_to_template_urls(self):
+        template = compile_template('<link href="/index.css"><img src="/a.png"><a href="//cdn/x">{{ Content }}</a>', '/base/')
+        html = template.render_to_string({'Content': 'href="/not-a-link"'})
+        self.assertEqual(html, '<link href="/base/index.css"><img src="/base/a.png"><a href="//cdn/x">href="/not-a-link"</a>')
+
+    def test_partials(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, 'header.html'), 'w') as file:
+                file.write('<header><a href="/">{{ Title }}</a></header>')
+            template = compile_template('{{> header.html }}<main>{{ Content }}</main>', '/base/', directory)
+            self.assertEqual(template.render_to_string({'Title': 'Home', 'Content': 'x'}),
+                             '<header><a href="/base/">Home</a></header><main>x</main>')
+
+    def test_missing_partial(self):
+        with self.assertRaises(TemplateError):
+            compile_template('{{> missing.html }}', None, tempfile.gettempdir())
+
+    def test_recursive_partial(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, 'loop.html'), 'w') as file:
+                file.write('{{> loop.html }}')
+            with self.assertRaises(TemplateError):
+                compile_template('{{> loop.html }}', None, directory)
+
+    def test_load_template_is_cached_until_changed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'template.html')
+            with open(path, 'w') as file:
+                file.write('<h1>{{ Title }}</h1>')
+            template = load_template(path, '/')
+            self.assertIs(load_template(path, '/'), template)
+            self.assertIsNot(load_template(path, '/other/'), template)
+
+            with open(path, 'w') as file:
+                file.write('<h2>{{ Title }}</h2> changed')
+            self.assertEqual(load_template(path, '/').render_to_string({'Title': 'x'}), '<h2>x</h2> changed')
+
+
+if __name__ == '__main__':
+    unittest.main()
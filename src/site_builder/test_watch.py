@@ -0,0 +1,80 @@
+import json
+import os
+import unittest
+
+from fixtures import TempDirTestCase, make_png, restore_global_state
+from site_builder.images import ImageOptimizer
+from site_builder.search_index import SearchIndex
+from site_builder.watch import SiteWatcher
+
+
+class TestSiteWatcher(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write_site({'index.md': '# Home\n\n[post](/blog/post)', 'blog/post/index.md': '# Post\n\ntext'},
+                        {'index.css': 'body {}'})
+        self.watcher = SiteWatcher(self.root + 'content/', self.root + 'static/', self.root + 'template.html',
+                                   self.root + 'docs/', '/', self.root + '.cache/asset_manifest.json')
+        self.watcher.build()
+
+    def _poll(self):
+        return self.watcher.poll()
+
+    def test_no_changes(self):
+        self.assertEqual(self._poll(), [])
+
+    def test_page_change_rebuilds_only_that_page(self):
+        self.write('content/blog/post/index.md', '# Post\n\nchanged', touch=True)
+        self.assertEqual(self._poll(), [self.root + 'docs/blog/post/index.html'])
+        self.assertIn('changed', self.read('docs/blog/post/index.html'))
+
+    def test_template_change_rerenders_without_parsing(self):
+        documents = dict(self.watcher.documents)
+        self.write('template.html', '<h1>{{ Title }}</h1>{{ Content }}', touch=True)
+        self.assertEqual(self._poll(), [self.root + 'template.html'])
+        self.assertEqual(self.watcher.documents, documents)
+        self.assertTrue(self.read('docs/index.html').startswith('<h1>Home</h1>'))
+
+    def test_static_change_syncs_only_that_asset(self):
+        self.write('static/index.css', 'body { color: red }', touch=True)
+        self.assertEqual(self._poll(), [self.root + 'docs/index.css'])
+        self.assertEqual(self.read('docs/index.css'), 'body { color: red }')
+
+    def test_images_are_optimized_and_sized(self):
+        restore_global_state(self)
+        self.write('content/index.md', '# Home\n\n![map](/images/map.png)', touch=True)
+        self.write('static/images/map.png', make_png(12, 8))
+        watcher = SiteWatcher(self.root + 'content/', self.root + 'static/', self.root + 'template.html',
+                              self.root + 'docs/', '/', self.root + '.cache/asset_manifest.json',
+                              image_optimizer=ImageOptimizer(self.root + '.cache/images'))
+        watcher.build()
+        self.assertIn('<img src="/images/map.png" alt="map" width="12" height="8"', self.read('docs/index.html'))
+        self.assertLess(os.path.getsize(self.root + 'docs/images/map.png'),
+                        os.path.getsize(self.root + 'static/images/map.png'))
+
+        self.write('static/images/map.png', make_png(20, 10), touch=True)
+        self.assertEqual(watcher.poll(), [self.root + 'docs/images/map.png'])
+        self.assertIn('width="20" height="10"', self.read('docs/index.html'))
+
+    def test_added_and_removed_pages(self):
+        self.write('content/new.md', '# New', touch=True)
+        os.remove(self.root + 'content/blog/post/index.md')
+        self.assertEqual(sorted(self._poll()), [self.root + 'docs/blog/post/index.html', self.root + 'docs/new.html'])
+        self.assertTrue(os.path.exists(self.root + 'docs/new.html'))
+        self.assertFalse(os.path.exists(self.root + 'docs/blog'))
+
+    def test_search_index_follows_page_changes(self):
+        watcher = SiteWatcher(self.root + 'content/', self.root + 'static/', self.root + 'template.html',
+                              self.root + 'docs/', '/', self.root + '.cache/asset_manifest.json',
+                              search_index=SearchIndex.load(self.root + '.cache/search_index.json'))
+        watcher.build()
+        self.write('content/blog/post/index.md', '# Post\n\nmordor', touch=True)
+        watcher.poll()
+        index = json.loads(self.read('docs/search/index.json'))
+        shard = json.loads(self.read('docs/search/' + index['shards']['m']))
+        self.assertEqual(index['pages'][shard['mordor'][0]], ['/blog/post/', 'Post'])
+        self.assertNotIn('t', index['shards'])
+
+
+if __name__ == '__main__':
+    unittest.main()
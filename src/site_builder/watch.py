@@ -0,0 +1,148 @@
+import logging
+import os
+import time
+
+from markdown_converters.block_memo import block_memo
+from site_builder.assets import sync_assets, discover_assets
+from site_builder.manifest import hash_file, remove_output
+from site_builder.pages import discover_pages, page_url, write_document, read_document
+from site_builder.template import load_template
+from textnode import set_image_sizes
+
+logger = logging.getLogger(__name__)
+
+class SiteWatcher:
+    # Polls content, static and template files. The dependency graph maps every input file to the output it
+    # affects, and parsed documents stay in memory so a template change only re-renders pages.
+    def __init__(self, content_dir, static_dir, template_path, dest_dir, basepath, asset_manifest_path,
+                 parse_cache=None, search_index=None, image_optimizer=None):
+        self.content_dir = content_dir
+        self.static_dir = static_dir
+        self.template_path = template_path
+        self.dest_dir = dest_dir
+        self.basepath = basepath
+        self.asset_manifest_path = asset_manifest_path
+        self.parse_cache = parse_cache
+        self.search_index = search_index
+        self.image_optimizer = image_optimizer
+        self.image_sizes = {}
+        self.documents = {}
+        self.graph = {}
+        self.stats = {}
+
+    def build(self):
+        self._sync_assets()
+        self.stats, self.graph = self._scan()
+        for source, dest in self._pages():
+            self._parse_page(source)
+            self._render_page(source, dest)
+        self._update_search_index(self._pages())
+
+    def poll(self):
+        stats, graph = self._scan()
+        changed = [path for path, stat in stats.items() if self.stats.get(path) != stat]
+        removed = [path for path in self.stats if path not in stats]
+        previous_graph = self.graph
+        self.stats, self.graph = stats, graph
+
+        rebuilt = []
+        changed_pages = []
+        kinds = set(map(lambda path: (graph.get(path) or previous_graph[path])[0], changed + removed))
+        template_changed = 'template' in kinds
+        # changed image sizes change the pages that show the images
+        rerender_all = ('asset' in kinds and self._sync_assets()) or template_changed
+        for path in sorted(changed + removed):
+            was_removed = path not in stats
+            kind, output = (previous_graph if was_removed else graph)[path]
+            if kind == 'template':
+                continue
+            elif kind == 'asset':
+                rebuilt.append(output)
+            elif was_removed:
+                self.documents.pop(path, None)
+                remove_output(output, self.dest_dir)
+                rebuilt.append(output)
+                changed_pages.append(path)
+            else:
+                self._parse_page(path)
+                if not rerender_all:
+                    self._render_page(path, output)
+                rebuilt.append(output)
+                changed_pages.append(path)
+        if rerender_all:
+            for source, dest in self._pages():
+                self._render_page(source, dest)
+        if template_changed:
+            rebuilt.append(self.template_path)
+        if changed_pages:
+            self._update_search_index([(path, graph[path][1]) for path in changed_pages if path in graph])
+        return rebuilt
+
+    def run(self, interval=0.1):
+        logger.info('Watching %s, %s and %s for changes', self.content_dir, self.static_dir, self.template_path)
+        while True:
+            start = time.perf_counter()
+            try:
+                rebuilt = self.poll()
+            except Exception as e:
+                logger.error('Rebuild failed: %s: %s', type(e).__name__, e)
+                rebuilt = []
+            if rebuilt:
+                logger.info('Rebuilt %s in %.1f ms', ', '.join(rebuilt), (time.perf_counter() - start) * 1000)
+            time.sleep(interval)
+
+    def _pages(self):
+        return [(path, output) for path, (kind, output) in sorted(self.graph.items()) if kind == 'page']
+
+    def _parse_page(self, source):
+        self.documents[source] = read_document(source, self.parse_cache)
+
+    def _render_page(self, source, dest):
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        try:
+            write_document(self.documents[source], load_template(self.template_path, self.basepath), dest, self.basepath)
+        except Exception as e:
+            logger.error('Failed to generate page from %s: %s: %s', source, type(e).__name__, e)
+
+    def _update_search_index(self, pages):
+        if self.search_index is None:
+            return
+        self.search_index.remove_missing(set(source for source, _ in self._pages()))
+        for source, dest in pages:
+            try:
+                self.search_index.update(source, page_url(dest, self.dest_dir, self.basepath), self.documents[source],
+                                         hash_file(source))
+            except Exception as e:
+                logger.error('Failed to index %s for search: %s: %s', source, type(e).__name__, e)
+        self.search_index.write(os.path.join(self.dest_dir, 'search'))
+        self.search_index.save()
+
+    def _sync_assets(self):
+        # syncs the static files as a normal build does and returns whether the image sizes changed
+        stats = sync_assets(self.static_dir, self.dest_dir, self.asset_manifest_path,
+                            image_optimizer=self.image_optimizer)
+        if stats.image_sizes == self.image_sizes:
+            return False
+        self.image_sizes = stats.image_sizes
+        set_image_sizes(self.image_sizes)
+        # memoized blocks keep the html they were rendered with, which has the old sizes
+        block_memo.clear()
+        return True
+
+    def _scan(self):
+        stats = {}
+        graph = {}
+        for source, dest in discover_pages(self.content_dir, self.dest_dir):
+            stats[source] = _stat_key(os.stat(source))
+            graph[source] = ('page', dest)
+        for relative_path, stat in discover_assets(self.static_dir).items():
+            source = os.path.join(self.static_dir, relative_path)
+            stats[source] = _stat_key(stat)
+            graph[source] = ('asset', os.path.join(self.dest_dir, relative_path))
+        for template_file in (self.template_path,) + load_template(self.template_path, self.basepath).dependencies:
+            stats[template_file] = _stat_key(os.stat(template_file))
+            graph[template_file] = ('template', None)
+        return stats, graph
+
+def _stat_key(stat):
+    return stat.st_mtime_ns, stat.st_size
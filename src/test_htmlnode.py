@@ -1,4 +1,5 @@
 import unittest
+from io import StringIO
 
 from htmlnode import HTMLNode, LeafNode, ParentNode
 
@@ -16,6 +17,20 @@ class TestHtmlNode(unittest.TestCase):
         node = HTMLNode(props={'dummy':'prop', 'other':'prop2'})
         self.assertEqual(node.props_to_html(), ' dummy="prop" other="prop2"')
 
+    def test_props_to_html_basepath(self):
+        node = HTMLNode(props={'href': '/page', 'src': '/image.png', 'title': '/kept'})
+        self.assertEqual(node.props_to_html(), ' href="/page" src="/image.png" title="/kept"')
+        self.assertEqual(node.props_to_html('/base/'), ' href="/base/page" src="/base/image.png" title="/kept"')
+
+    def test_props_to_html_basepath_ignores_external_urls(self):
+        node = HTMLNode(props={'href': 'https://www.boot.dev', 'src': '//cdn.example.com/x.png'})
+        self.assertEqual(node.props_to_html('/base/'), ' href="https://www.boot.dev" src="//cdn.example.com/x.png"')
+
+    def test_to_html_not_implemented(self):
+        node = HTMLNode('p', 'value')
+        with self.assertRaises(NotImplementedError):
+            node.to_html()
+
 class TestLeafNode(unittest.TestCase):
     def test_to_html_no_tag(self):
         node = LeafNode(value='value')
@@ -85,5 +100,36 @@ class TestParentNode(unittest.TestCase):
              ])
         self.assertEqual(node.to_html(), '<p><b>Bold text</b>Normal text<i>Italic text</i>Normal text</p>')
 
+    def test_to_html_nested(self):
+        node = ParentNode('div', [
+            ParentNode('p', [LeafNode('b', 'Bold'), LeafNode(None, ' text')], {'class': 'intro'}),
+            ParentNode('ul', [ParentNode('li', [LeafNode('a', 'link', {'href': '/x'})])]),
+        ])
+        self.assertEqual(node.to_html(),
+                         '<div><p class="intro"><b>Bold</b> text</p><ul><li><a href="/x">link</a></li></ul></div>')
+
+    def test_to_html_basepath(self):
+        node = ParentNode('p', [LeafNode('a', 'href="/text"', {'href': '/page'}), LeafNode('code', 'src="/x"')])
+        self.assertEqual(node.to_html('/base/'), '<p><a href="/base/page">href="/text"</a><code>src="/x"</code></p>')
+
+    def test_write_html(self):
+        node = ParentNode('p', [LeafNode('b', 'Bold text'), LeafNode(None, 'Normal text')])
+        output = StringIO()
+        node.write_html(output)
+        self.assertEqual(output.getvalue(), node.to_html())
+
+    def test_to_html_deeply_nested(self):
+        node = LeafNode(None, 'deep')
+        for _ in range(10000):
+            node = ParentNode('span', [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith('<span><span>'))
+        self.assertEqual(len(html), len('deep') + 10000 * len('<span></span>'))
+
+    def test_to_html_invalid_child(self):
+        node = ParentNode('p', [LeafNode('b', 'Bold text'), LeafNode('i', None)])
+        with self.assertRaises(ValueError):
+            node.to_html()
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+
+import instrumentation
+from markdown_converters.block_memo import block_memo
+from site_builder.pages import generate_pages_recursive
+
+
+class TestInstrumentation(unittest.TestCase):
+    def tearDown(self):
+        instrumentation.deactivate()
+
+    def test_inactive_phase_is_a_no_op(self):
+        self.assertIsNone(instrumentation.active())
+        with instrumentation.phase('read'):
+            instrumentation.count('pages')
+        self.assertIs(instrumentation.phase('read'), instrumentation.phase('write'))
+
+    def test_nested_phases_are_exclusive(self):
+        profiler = instrumentation.Profiler()
+        instrumentation.activate(profiler)
+        with instrumentation.page('page.md'):
+            with instrumentation.phase('outer'):
+                with instrumentation.phase('inner'):
+                    sum(range(100000))
+            instrumentation.count('pages')
+        instrumentation.deactivate()
+
+        report = profiler.report()
+        self.assertEqual(report['phases']['outer']['calls'], 1)
+        self.assertEqual(report['phases']['inner']['calls'], 1)
+        self.assertLessEqual(report['phase_seconds'], report['wall_seconds'])
+        self.assertEqual(report['counters'], {'pages': 1})
+        self.assertEqual(report['slowest_pages'][0]['page'], 'page.md')
+        self.assertEqual(set(report['slowest_pages'][0]['phases']), {'outer', 'inner'})
+        self.assertIsNone(report['peak_memory'])
+
+    def test_merge(self):
+        profiler = instrumentation.Profiler()
+        profiler.merge({'phases': {'read': 1.0}, 'calls': {'read': 2}, 'counters': {'pages': 2},
+                        'pages': {'a.md': {'seconds': 1.0, 'phases': {'read': 1.0}}}, 'peak_memory': 10})
+        profiler.merge({'phases': {'read': 0.5}, 'calls': {'read': 1}, 'counters': {'pages': 1},
+                        'pages': {'b.md': {'seconds': 2.0, 'phases': {'read': 0.5}}}, 'peak_memory': 5})
+        report = profiler.report()
+        self.assertEqual(report['phases']['read']['calls'], 3)
+        self.assertEqual(report['counters'], {'pages': 3})
+        self.assertEqual(list(map(lambda page: page['page'], report['slowest_pages'])), ['b.md', 'a.md'])
+
+    def test_profiled_build(self):
+        with tempfile.TemporaryDirectory() as root:
+            os.makedirs(os.path.join(root, 'content', 'post'))
+            for name in ('index.md', 'post/index.md'):
+                with open(os.path.join(root, 'content', name), 'w') as file:
+                    file.write('# Title\n\nsome **bold** text\n\n* a\n* b')
+            with open(os.path.join(root, 'template.html'), 'w') as file:
+                file.write('{{ Title }}{{ Content }}')
+
+            for workers in (1, 2):
+                # forked workers would otherwise inherit the blocks memoized by the serial run
+                block_memo.clear()
+                profiler = instrumentation.Profiler(trace_memory=True)
+                instrumentation.activate(profiler)
+                generate_pages_recursive(root + '/content/', root + '/template.html', root + '/docs/', '/', workers)
+                instrumentation.deactivate()
+
+                report = profiler.report()
+                self.assertEqual(report['pages'], 2)
+                self.assertEqual(report['counters']['pages'], 2)
+                self.assertEqual(set(report['phases']),
+                                 {'read', 'blocks', 'inline', 'tree', 'to_html', 'template', 'write'})
+                self.assertGreater(report['peak_memory'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import subprocess
+import sys
+import time
+import unittest
+
+import main
+from fixtures import TempDirTestCase, restore_global_state
+from site_builder.assets import LINK_MODES
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+# interpreter start plus `import main`, generous enough for a loaded CI machine
+STARTUP_BUDGET = 0.5
+
+
+def run_python(code, cwd):
+    env = dict(os.environ, PYTHONPATH=SRC_DIR)
+    return subprocess.run([sys.executable, '-c', code], cwd=cwd, env=env, capture_output=True, text=True)
+
+
+class TestMain(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        restore_global_state(self)
+
+    def test_import_has_no_side_effects(self):
+        result = run_python('import main, sys; print(sorted(m for m in sys.modules if m.startswith("site_builder")))',
+                            self.root)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout, '[]\n')
+        self.assertEqual(os.listdir(self.root), [])
+
+    def test_startup_time(self):
+        timings = []
+        for _ in range(3):
+            start = time.perf_counter()
+            result = run_python('import main; main.parse_args([])', self.root)
+            timings.append(time.perf_counter() - start)
+            self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertLess(min(timings), STARTUP_BUDGET)
+
+    def test_defaults(self):
+        args = main.parse_args([])
+        self.assertEqual((args.basepath, args.content, args.static, args.template, args.output, args.cache_dir),
+                         ('/', 'content', 'static', 'template.html', 'docs', '.cache'))
+
+    def test_asset_modes_match_assets_module(self):
+        for mode in LINK_MODES:
+            self.assertEqual(main.parse_args(['--asset-mode', mode]).asset_mode, mode)
+
+    def test_build_with_custom_paths(self):
+        self.write('site/pages/index.md', '# Home\n\n[about](/about)')
+        self.write('site/assets/index.css', 'body {}')
+        self.write('site/layout.html', '<title>{{ Title }}</title>{{ Content }}')
+        site = os.path.join(self.root, 'site')
+        main.main(['/blog/', '-q', '--content', os.path.join(site, 'pages'), '--static', os.path.join(site, 'assets'),
+                   '--template', os.path.join(site, 'layout.html'), '--output', os.path.join(site, 'public'),
+                   '--cache-dir', os.path.join(site, 'cache')])
+
+        with open(os.path.join(site, 'public', 'index.html')) as file:
+            self.assertEqual(file.read(), '<title>Home</title><div><h1>Home</h1><p><a href="/blog/about">about</a></p></div>')
+        self.assertTrue(os.path.exists(os.path.join(site, 'public', 'index.css')))
+        self.assertTrue(os.path.exists(os.path.join(site, 'cache', 'asset_manifest.json')))
+        self.assertTrue(os.listdir(os.path.join(site, 'cache', 'parse')))
+
+    def test_assets_are_skipped_when_pages_are_rebuilt(self):
+        self.write_site({'index.md': '# Home'}, {'index.css': 'body {}', 'images/map.png': 'not a png'})
+        for mode in ([], ['--in-place']):
+            output = self.root + 'public' + ''.join(mode)
+            args = ['-q', '--content', self.root + 'content', '--static', self.root + 'static', '--template',
+                    self.root + 'template.html', '--output', output, '--cache-dir', self.root + 'cache' + ''.join(mode)]
+            main.main(args + mode)
+            with self.assertLogs('site_builder.assets', 'INFO') as logs:
+                main.main(args + mode)
+            self.assertEqual(logs.output, ['INFO:site_builder.assets:Copied 0 assets (0 bytes), skipped 2 unchanged, '
+                                           'removed 0 stale'])
+            self.assertTrue(os.path.exists(output + '/images/map.png'))
+
+if __name__ == '__main__':
+    unittest.main()
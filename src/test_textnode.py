@@ -1,6 +1,6 @@
 import unittest
 
-from textnode import TextNode, TextType
+from textnode import TextNode, TextType, set_image_sizes
 from htmlnode import LeafNode
 
 class TestTextNode(unittest.TestCase):
@@ -42,6 +42,17 @@ class TestTextNode(unittest.TestCase):
         for node_tuple in node_tuples:
             self.assertEqual(node_tuple[0].to_html_node(), node_tuple[1])
 
+    def test_image_with_known_size(self):
+        set_image_sizes({'/images/map.png': (640, 480)})
+        try:
+            self.assertEqual(TextNode('map', TextType.IMAGES, '/images/map.png').to_html_node().to_html(),
+                             '<img src="/images/map.png" alt="map" width="640" height="480" loading="lazy" '
+                             'decoding="async"></img>')
+            self.assertEqual(TextNode('other', TextType.IMAGES, '/other.png').to_html_node(),
+                             LeafNode('img', '', {'src': '/other.png', 'alt': 'other'}))
+        finally:
+            set_image_sizes({})
+
     def test_to_html_missing_text_type(self):
         node = TextNode("This is a text node", TextType.NORMAL)
         node.text_type = 'other'
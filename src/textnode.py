@@ -1,4 +1,5 @@
 from enum import Enum
+from types import MappingProxyType
 
 from htmlnode import LeafNode
 
@@ -10,7 +11,28 @@ class TextType(Enum):
     LINKS = 'links'
     IMAGES = 'images'
 
+text_type_to_html_tag = MappingProxyType({
+    TextType.NORMAL: '',
+    TextType.BOLD: 'b',
+    TextType.ITALIC: 'i',
+    TextType.CODE: 'code',
+    TextType.LINKS: 'a',
+    TextType.IMAGES: 'img',
+})
+
+# url -> (width, height) of local images, set by the build once images are processed
+_image_sizes = {}
+
+def set_image_sizes(sizes):
+    global _image_sizes
+    _image_sizes = dict(sizes)
+
+def image_sizes():
+    return _image_sizes
+
 class TextNode:
+    __slots__ = ('text', 'text_type', 'url')
+
     def __init__(self, text, text_type, url=None):
         self.text = text
         self.text_type = text_type
@@ -23,21 +45,16 @@ class TextNode:
         return self.text == other.text and self.text_type == other.text_type and self.url == other.url
 
     def to_html_node(self):
-        text_type_to_html_tag = {
-            TextType.NORMAL: '',
-            TextType.BOLD: 'b',
-            TextType.ITALIC: 'i',
-            TextType.CODE: 'code',
-            TextType.LINKS: 'a',
-            TextType.IMAGES: 'img',
-        }
-
         text = self.text
         props = None
         if self.text_type == TextType.LINKS:
             props = {'href': self.url}
         elif self.text_type == TextType.IMAGES:
             props = {'src': self.url, 'alt': self.text}
+            size = _image_sizes.get(self.url)
+            if size is not None:
+                # known dimensions let the browser reserve the space, so the image can load lazily
+                props.update(width=str(size[0]), height=str(size[1]), loading='lazy', decoding='async')
             text = ''
 
         if self.text_type not in text_type_to_html_tag: